@@ -1,4 +1,11 @@
+"""Entrada ASGI.
+
+Necessaria para o streaming de core.views.catalogo_eventos (Server-Sent Events):
+cada conexao aberta e so uma corrotina esperando no event loop. Em producao,
+scripts/start.sh usa este modulo com o worker do uvicorn quando ASGI=1.
+"""
 import os
+
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chadepanela.settings")
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -28,12 +29,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # /healthz e /readyz (core.health): respondidos aqui, sem sessao, auth nem templates
+    "core.middleware.HealthCheckMiddleware",
+    # Medicoes por requisicao (Server-Timing, /painel/desempenho/). Desligado: custo zero.
+    "core.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Depois do whitenoise: estaticos ja saem pre-comprimidos (.br/.gz do collectstatic)
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Usuario + perfil do cache de sessoes (core.auth); limpa sessoes expiradas
+    "core.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -44,8 +52,17 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # HTML sem indentacao (core.template_loaders), compilado uma vez por processo
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "core.template_loaders.FilesystemLoader",
+                        "core.template_loaders.AppDirectoriesLoader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -69,6 +86,82 @@ DATABASES = {
         ssl_require=ssl_require,
     )
 }
+if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    # Banco de teste em arquivo: em memoria (cache compartilhado) o SQLite devolve
+    # "table is locked" em vez de esperar, e os testes com threads falhariam
+    DATABASES["default"]["TEST"] = {"NAME": os.path.join(tempfile.gettempdir(), "chadepanela-test.sqlite3")}
+
+# Cache compartilhado entre os workers do gunicorn.
+# Com REDIS_URL, usa Redis. Sem servico externo: cache em disco, pensado para
+# desenvolvimento / um unico processo. Cada set() do FileBasedCache lista o
+# diretorio inteiro (cull), entao o custo cresce com o numero de entradas, e
+# add() nao e atomico entre processos. Deploys com varios workers devem
+# configurar REDIS_URL (o gunicorn avisa no boot).
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_DIR = os.getenv("CACHE_DIR", str(BASE_DIR / ".cache"))
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            # Padrao do Django e 300: os fragmentos (2 tipos x papel x presente),
+            # as contagens por usuario e a versao das estatisticas nao caberiam
+            # e o cull apagaria entradas vivas. Mais que isso deixa cada set()
+            # lento (ver acima): acima do limite, o cull apaga metade de uma vez.
+            "OPTIONS": {
+                "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "3000")),
+                "CULL_FREQUENCY": 2,
+            },
+        }
+    }
+
+# Sessoes e o usuario da sessao (core.auth) no cache "sessions". SESSION_CACHE escolhe:
+# - redis: padrao com REDIS_URL; engine cached_db (cache na frente da tabela);
+# - db: padrao sem servico externo; sessoes so na tabela (uma consulta por pk) e
+#   o usuario no cache padrao. Salvar a sessao nao passa pelo cull do cache em
+#   disco (que lista o diretorio inteiro a cada set);
+# - file: cached_db com cache em disco proprio (cada gravacao de sessao paga o cull);
+# - locmem: memoria do processo; so com um worker (cada processo teria o seu).
+SESSION_CACHE = os.getenv("SESSION_CACHE", "redis" if REDIS_URL else "db")
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+if SESSION_CACHE == "redis":
+    CACHES["sessions"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "sessions",
+    }
+elif SESSION_CACHE == "locmem":
+    CACHES["sessions"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+elif SESSION_CACHE == "file":
+    CACHES["sessions"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("SESSION_CACHE_DIR", os.path.join(CACHE_DIR, "sessions")),
+        "OPTIONS": {"MAX_ENTRIES": 3000, "CULL_FREQUENCY": 2},
+    }
+else:
+    SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    # O usuario so e gravado no cache num miss (no maximo a cada USER_TIMEOUT)
+    CACHES["sessions"] = CACHES["default"]
+SESSION_CACHE_ALIAS = "sessions"
+# Intervalo da limpeza de sessoes expiradas (0 desliga; ai use `manage.py clearsessions`)
+SESSION_PURGE_SECONDS = int(os.getenv("SESSION_PURGE_SECONDS", str(6 * 60 * 60)))
+
+# Eventos de reserva em tempo real (core.events). Com varios workers o broker
+# precisa ser compartilhado: RedisBroker quando ha REDIS_URL.
+EVENTS_BROKER = os.getenv(
+    "EVENTS_BROKER",
+    "core.events.RedisBroker" if REDIS_URL else "core.events.LocalBroker",
+)
 
 # Validação de senha
 AUTH_PASSWORD_VALIDATORS = [
@@ -86,11 +179,16 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"]
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", str(BASE_DIR / "media")))
 
+STORAGES = {
+    # Uploads com hash do conteudo no nome (URLs imutaveis, ver core.media)
+    "default": {"BACKEND": "core.storage.HashedMediaStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Auth
@@ -112,6 +210,15 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "nao-responda@exemplo.com")
 
+# Compressao de HTML/JSON dinamico (core.middleware.CompressionMiddleware)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Instrumentacao de desempenho (SQL/templates/view por requisicao)
+PERF_INSTRUMENTATION = os.getenv("PERF_INSTRUMENTATION", "0") == "1"
+
+# Identifica o deploy; entra no ETag das paginas (templates novos invalidam o cache do navegador)
+RELEASE_ID = os.getenv("RELEASE_ID") or os.getenv("RAILWAY_DEPLOYMENT_ID", "")
+
 # Setup
 SETUP_TOKEN = os.getenv("SETUP_TOKEN", "")
 
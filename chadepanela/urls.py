@@ -1,13 +1,13 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from core.media import serve_media
 
 urlpatterns = [
     # Admin tecnico (opcional) - nao e o painel administrativo
     path("django-admin/", admin.site.urls),
     path("", include("core.urls")),
+    # Uploads (tambem em producao): ETag, Range, cache imutavel e sendfile
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
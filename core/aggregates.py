@@ -0,0 +1,17 @@
+from django.db.models import Aggregate, TextField, Value
+
+
+class GroupConcat(Aggregate):
+    """Junta os valores do grupo em um texto: GROUP_CONCAT (SQLite) / STRING_AGG (Postgres).
+
+    A ordem dos itens dentro do grupo nao e garantida.
+    """
+
+    function = "GROUP_CONCAT"
+    output_field = TextField()
+
+    def __init__(self, expression, separator=",", **extra):
+        super().__init__(expression, Value(separator), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function="STRING_AGG", **extra_context)
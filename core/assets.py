@@ -0,0 +1,472 @@
+"""Montagem do front-end servido pelo proprio site (``manage.py montar_assets``).
+
+Fontes em ``assets/vendor`` (Bootstrap 5.3.3, Font Awesome Free, fontes de
+texto) e ``static/css``/``static/js``; saida em ``static/dist``:
+
+- ``app.css``: Bootstrap + so os icones do Font Awesome usados nos templates +
+  @font-face + styles.css.
+- ``app.js``: bootstrap.bundle + main.js.
+- ``critical.css``: regras do app.css que o topo do catalogo usa; vai inline
+  no ``<head>`` e o app.css carrega sem bloquear a primeira pintura.
+- ``fonts/*.woff2``: Font Awesome reduzido aos glifos usados; fontes de texto
+  no subconjunto latino (titulos de presentes podem ter qualquer acento).
+
+Nomes com hash, .gz/.br e cache longo ficam com o whitenoise no collectstatic.
+"""
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+
+VENDOR_DIR = Path(settings.BASE_DIR) / "assets" / "vendor"
+STATIC_DIR = Path(settings.BASE_DIR) / "static"
+DIST_DIR = STATIC_DIR / "dist"
+TEMPLATES_DIR = Path(settings.BASE_DIR) / "templates"
+
+BOOTSTRAP_CSS = VENDOR_DIR / "bootstrap" / "bootstrap.min.css"
+BOOTSTRAP_JS = VENDOR_DIR / "bootstrap" / "bootstrap.bundle.min.js"
+FONTAWESOME_CSS = VENDOR_DIR / "fontawesome" / "all.min.css"
+FONTAWESOME_FONTS = [
+    # (arquivo de origem, peso)
+    (VENDOR_DIR / "fontawesome" / "fa-solid-900.ttf", 900),
+    (VENDOR_DIR / "fontawesome" / "fa-regular-400.ttf", 400),
+]
+# (familia, arquivo variavel de origem, faixa de pesos, eixos fixados/limitados).
+# Sem o arquivo, o styles.css cai na fonte alternativa da propria declaracao
+# font-family. Fraunces: eixos extras no padrao (como o Google Fonts servia
+# com so ``wght``) e pesos 500-700, os usados no styles.css; metade do tamanho.
+TEXT_FONTS = [
+    ("Manrope", VENDOR_DIR / "fonts" / "Manrope-VariableFont_wght.ttf", "200 800", None),
+    (
+        "Fraunces",
+        VENDOR_DIR / "fonts" / "Fraunces-VariableFont_SOFT,WONK,opsz,wght.ttf",
+        "500 700",
+        {"SOFT": 0, "WONK": 1, "opsz": 9, "wght": (500, 700)},
+    ),
+]
+# Mesmo recorte "latin" do Google Fonts
+LATIN_RANGE = (
+    "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+0304,U+0308,"
+    "U+0329,U+2000-206F,U+2074,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,U+FEFF,U+FFFD"
+)
+# Templates do topo do catalogo (critical.css)
+CRITICAL_TEMPLATES = [
+    "base.html",
+    "catalogo/catalogo.html",
+    "catalogo/_gifts.html",
+    "catalogo/_card_media.html",
+    "catalogo/_card_body.html",
+    "catalogo/_imagem.html",
+]
+
+# Fora do critico: tema escuro (nao usado), pseudo-elementos de formulario,
+# componentes que so aparecem depois de um clique e estados de interacao
+# (hover/foco/validacao), que o app.css traz antes de alguem interagir
+CRITICAL_DROP_RE = re.compile(
+    r"data-bs-theme=dark|::-webkit-|::-moz-|::file-selector-button|\.modal|\.dropdown-(?:menu|item|divider|header)"
+    r"|\.btn-close|\.show\b|\.collapsing|:hover|:focus|:active|:disabled|\.disabled|:checked|:invalid|:valid"
+    r"|\.is-(?:in)?valid|\.was-validated"
+)
+# Declaracoes que so importam depois da primeira pintura (transicoes e
+# variaveis de estados como hover/foco)
+STATE_DECLARATION_RE = re.compile(r"^(?:transition|--[\w-]*-(?:hover|active|focus|disabled)-[\w-]*)\s*:")
+# Marcacao escondida no carregamento: suas classes nao contam para o critico
+HIDDEN_CLASSES = {"modal", "dropdown-menu"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+CLASS_ATTR_RE = re.compile(r"""class\s*=\s*["']([^"']*)["']""")
+CLASS_TOKEN_RE = re.compile(r"[A-Za-z_-][\w-]*")
+ICON_RE = re.compile(r"\bfa-[a-z0-9-]+\b")
+SELECTOR_CLASS_RE = re.compile(r"\.(-?[A-Za-z_][\w-]*)")
+SELECTOR_TAG_RE = re.compile(r"(?:^|[\s>+~(,])([a-z][a-z0-9]*)")
+TAG_RE = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)")
+VAR_RE = re.compile(r"var\((--[\w-]+)")
+NOT_RE = re.compile(r":not\([^)]*\)")
+CONTENT_RE = re.compile(r'content:\s*"\\([0-9a-f]{4,5})"')
+BANNER_RE = re.compile(r"/\*!.*?\*/", re.S)
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+# Blocos cujo conteudo sao outras regras (os demais, como @font-face, ficam inteiros)
+NESTED_AT_RULES = ("@media", "@supports", "@layer", "@container")
+
+
+class AssetError(Exception):
+    pass
+
+
+@dataclass
+class BuildResult:
+    files: dict = field(default_factory=dict)
+    icons: list = field(default_factory=list)
+    missing_fonts: list = field(default_factory=list)
+
+
+# ----------------------------------------------------------------------
+# CSS
+
+
+def _find_close(css: str, start: int) -> int:
+    """Indice da chave que fecha a aberta em ``start`` (ignora strings)."""
+    depth = 0
+    quote = None
+    i = start
+    while i < len(css):
+        char = css[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise AssetError("CSS com chaves desbalanceadas.")
+
+
+def parse_css(css: str):
+    """Lista de ("rule", prelude, corpo) e ("block", prelude, [itens]); sem comentarios."""
+    css = COMMENT_RE.sub("", css)
+    items = []
+    i = 0
+    while i < len(css):
+        brace = css.find("{", i)
+        semi = css.find(";", i)
+        if brace == -1:
+            break
+        if semi != -1 and semi < brace:
+            # @charset/@import: descartados (o bundle declara o proprio @charset)
+            i = semi + 1
+            continue
+        prelude = " ".join(css[i:brace].split())
+        close = _find_close(css, brace)
+        inner = css[brace + 1 : close]
+        if prelude.startswith(NESTED_AT_RULES):
+            items.append(("block", prelude, parse_css(inner)))
+        else:
+            items.append(("rule", prelude, inner))
+        i = close + 1
+    return items
+
+
+def _minify_body(body: str) -> str:
+    body = " ".join(body.split())
+    body = re.sub(r"\s*([{};>])\s*", r"\1", body)
+    body = re.sub(r";}", "}", body)
+    return body.strip().rstrip(";")
+
+
+def render_css(items) -> str:
+    out = []
+    for kind, prelude, content in items:
+        if kind == "block":
+            inner = render_css(content)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        else:
+            out.append(f"{prelude}{{{_minify_body(content)}}}")
+    return "".join(out)
+
+
+def _split_selectors(prelude: str):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(prelude[start:i].strip())
+            start = i + 1
+    parts.append(prelude[start:].strip())
+    return parts
+
+
+def filter_css(items, keep_class, drop=None, keep_tag=None):
+    """Mantem as regras cujos seletores so usam classes aceitas por ``keep_class``.
+
+    Seletores de uma regra sao filtrados um a um; ``:not(.x)`` nao conta (casa
+    justamente quando a classe nao esta presente). Com ``keep_tag``, os nomes
+    de elemento tambem sao filtrados. @keyframes ficam so se o nome aparece
+    em alguma regra mantida; @font-face sai sempre (o bundle declara as
+    fontes que gera).
+    """
+    kept = []
+    keyframes = []
+    for kind, prelude, content in items:
+        if kind == "block":
+            inner = filter_css(content, keep_class, drop, keep_tag)
+            if inner:
+                kept.append(("block", prelude, inner))
+            continue
+        if prelude.startswith("@font-face"):
+            continue
+        if prelude.startswith(("@keyframes", "@-webkit-keyframes")):
+            keyframes.append((kind, prelude, content))
+            continue
+        selectors = [
+            selector
+            for selector in _split_selectors(prelude)
+            if not (drop and drop.search(selector))
+            and all(keep_class(name) for name in SELECTOR_CLASS_RE.findall(NOT_RE.sub("", selector)))
+            and (keep_tag is None or all(keep_tag(name) for name in _selector_tags(selector)))
+        ]
+        if selectors:
+            kept.append(("rule", ",".join(selectors), content))
+    if keyframes:
+        used = render_css(kept)
+        for item in keyframes:
+            name = item[1].split()[-1]
+            if re.search(rf"\b{re.escape(name)}\b", used):
+                kept.append(item)
+    return kept
+
+
+def _selector_tags(selector: str):
+    # Sem [atributos] e sem o que vem depois de ":" em cada parte (pseudo-classes)
+    selector = re.sub(r"\[[^\]]*\]", "", NOT_RE.sub("", selector))
+    selector = re.sub(r"::?[\w-]+", "", selector)
+    return SELECTOR_TAG_RE.findall(selector)
+
+
+def _split_declarations(body: str):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(body):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == ";" and depth == 0:
+            parts.append(body[start:i].strip())
+            start = i + 1
+    parts.append(body[start:].strip())
+    return [part for part in parts if part]
+
+
+def prune_custom_properties(items):
+    """Tira das regras ``:root`` as variaveis CSS que nenhuma outra regra usa (direta ou indiretamente)."""
+    roots = [i for i, (kind, prelude, _content) in enumerate(items) if kind == "rule" and prelude.startswith(":root")]
+    others = [item for i, item in enumerate(items) if i not in roots]
+    used = set(VAR_RE.findall(render_css(others)))
+    declarations = {i: _split_declarations(items[i][2]) for i in roots}
+    # Variaveis definidas em termos de outras
+    pending = set(used)
+    while pending:
+        name = pending.pop()
+        for decls in declarations.values():
+            for decl in decls:
+                if decl.startswith(name + ":"):
+                    for ref in VAR_RE.findall(decl):
+                        if ref not in used:
+                            used.add(ref)
+                            pending.add(ref)
+    pruned = list(items)
+    for i in roots:
+        kept = [d for d in declarations[i] if not d.startswith("--") or d.split(":", 1)[0].strip() in used]
+        pruned[i] = ("rule", items[i][1], ";".join(kept))
+    return pruned
+
+
+def first_paint(items):
+    """Sem transicoes, variaveis de estado (hover/foco/...) e blocos de prefers-reduced-motion."""
+    out = []
+    for kind, prelude, content in items:
+        if kind == "block":
+            if "prefers-reduced-motion" not in prelude:
+                inner = first_paint(content)
+                if inner:
+                    out.append(("block", prelude, inner))
+            continue
+        declarations = [d for d in _split_declarations(content) if not STATE_DECLARATION_RE.match(d)]
+        if declarations:
+            out.append(("rule", prelude, ";".join(declarations)))
+    return out
+
+
+def _banners(css: str) -> str:
+    return "\n".join(BANNER_RE.findall(css))
+
+
+# ----------------------------------------------------------------------
+# Uso nos templates
+
+
+def _template_sources(names=None):
+    if names is not None:
+        return [(TEMPLATES_DIR / name).read_text(encoding="utf-8") for name in names]
+    return [path.read_text(encoding="utf-8") for path in sorted(TEMPLATES_DIR.rglob("*.html"))]
+
+
+def used_icons() -> set:
+    """Classes fa-* usadas nos templates, no main.js e nas views."""
+    sources = _template_sources()
+    sources.append((STATIC_DIR / "js" / "main.js").read_text(encoding="utf-8"))
+    sources.extend(path.read_text(encoding="utf-8") for path in (Path(settings.BASE_DIR) / "core").glob("*.py"))
+    return {match for source in sources for match in ICON_RE.findall(source)}
+
+
+def _without_hidden(source: str) -> str:
+    """Template sem os elementos de HIDDEN_CLASSES (e seus filhos)."""
+    out = []
+    depth = 0
+    pos = 0
+    for match in re.finditer(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>", source):
+        closing, tag, attrs = match.group(1), match.group(2).lower(), match.group(3)
+        if depth:
+            if tag in VOID_TAGS or attrs.endswith("/"):
+                continue
+            depth += -1 if closing else 1
+            if depth == 0:
+                pos = match.end()
+            continue
+        classes = set()
+        for value in CLASS_ATTR_RE.findall(attrs):
+            classes.update(CLASS_TOKEN_RE.findall(re.sub(r"{[%{].*?[%}]}", " ", value)))
+        if not closing and tag not in VOID_TAGS and classes & HIDDEN_CLASSES:
+            out.append(source[pos : match.start()])
+            depth = 1
+    if not depth:
+        out.append(source[pos:])
+    return "".join(out)
+
+
+def visible_markup(names):
+    """Classes e elementos da marcacao visivel no carregamento (sem modais/menus)."""
+    classes, tags = set(), {"html", "body"}
+    for source in _template_sources(names):
+        source = _without_hidden(source)
+        tags.update(tag.lower() for tag in TAG_RE.findall(source))
+        for value in CLASS_ATTR_RE.findall(source):
+            value = re.sub(r"{[%{].*?[%}]}", " ", value)
+            classes.update(CLASS_TOKEN_RE.findall(value))
+    return classes, tags
+
+
+# ----------------------------------------------------------------------
+# Fontes
+
+
+def subset_font(source: Path, target: Path, unicodes, keep_layout: bool = True, axes=None):
+    from fontTools import subset
+    from fontTools.varLib import instancer
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.desubroutinize = True
+    options.name_IDs = ["*"] if keep_layout else [1, 2, 3, 4, 6]
+    if not keep_layout:
+        options.layout_features = []
+        options.notdef_outline = True
+    font = subset.load_font(str(source), options)
+    if axes:
+        font = instancer.instantiateVariableFont(font, axes)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    subset.save_font(font, str(target), options)
+
+
+def _parse_range(value: str):
+    codepoints = set()
+    for part in value.split(","):
+        part = part.strip().removeprefix("U+")
+        start, _, end = part.partition("-")
+        codepoints.update(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
+
+
+# ----------------------------------------------------------------------
+# Montagem
+
+
+def _write(path: Path, content: str, result: BuildResult):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    result.files[str(path.relative_to(STATIC_DIR))] = path.stat().st_size
+
+
+def build(stdout=None) -> BuildResult:
+    for source in (BOOTSTRAP_CSS, BOOTSTRAP_JS, FONTAWESOME_CSS):
+        if not source.exists():
+            raise AssetError(f"Arquivo de origem ausente: {source}")
+
+    result = BuildResult()
+    fonts_dir = DIST_DIR / "fonts"
+
+    # Font Awesome: so os icones usados (+ modificadores como fa-2x)
+    icons = used_icons()
+    result.icons = sorted(icons)
+    fa_source = FONTAWESOME_CSS.read_text(encoding="utf-8")
+    fa_items = filter_css(parse_css(fa_source), lambda name: not name.startswith("fa") or name in icons)
+    fa_css = render_css(fa_items)
+    codepoints = {int(value, 16) for value in CONTENT_RE.findall(fa_css)}
+    faces = []
+    for source, weight in FONTAWESOME_FONTS:
+        target = fonts_dir / source.with_suffix(".woff2").name
+        subset_font(source, target, codepoints, keep_layout=False)
+        result.files[str(target.relative_to(STATIC_DIR))] = target.stat().st_size
+        faces.append(
+            f'@font-face{{font-family:"Font Awesome 6 Free";font-style:normal;font-weight:{weight};'
+            f'font-display:block;src:url(fonts/{target.name}) format("woff2")}}'
+        )
+
+    latin = _parse_range(LATIN_RANGE)
+    for family, source, weights, axes in TEXT_FONTS:
+        if not source.exists():
+            result.missing_fonts.append(family)
+            continue
+        target = fonts_dir / f"{family.lower()}-latin.woff2"
+        subset_font(source, target, latin, axes=axes)
+        result.files[str(target.relative_to(STATIC_DIR))] = target.stat().st_size
+        faces.append(
+            f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weights};'
+            f'font-display:swap;src:url(fonts/{target.name}) format("woff2");unicode-range:{LATIN_RANGE}}}'
+        )
+
+    bootstrap_source = BOOTSTRAP_CSS.read_text(encoding="utf-8")
+    styles_source = (STATIC_DIR / "css" / "styles.css").read_text(encoding="utf-8")
+    bootstrap_items = parse_css(bootstrap_source)
+    styles_items = parse_css(styles_source)
+
+    banners = "\n".join(filter(None, [_banners(bootstrap_source), _banners(fa_source)]))
+    app_css = (
+        '@charset "UTF-8";\n'
+        + banners
+        + "\n"
+        + render_css(bootstrap_items)
+        + "\n"
+        + fa_css
+        + "\n"
+        + "".join(faces)
+        + "\n"
+        + render_css(styles_items)
+        + "\n"
+    )
+    _write(DIST_DIR / "app.css", app_css, result)
+
+    # Critico: Bootstrap + styles.css filtrados pelas classes e elementos
+    # visiveis no topo do catalogo, sem o que so vale apos interacao, e so as
+    # variaveis :root que sobram em uso.
+    # Sem icones e @font-face: ate o app.css chegar o texto usa a fonte
+    # alternativa e os <i> ficam vazios (em vez de quadrados).
+    classes, tags = visible_markup(CRITICAL_TEMPLATES)
+    critical_items = [
+        *filter_css(bootstrap_items, classes.__contains__, CRITICAL_DROP_RE, tags.__contains__),
+        *filter_css(styles_items, classes.__contains__, CRITICAL_DROP_RE, tags.__contains__),
+    ]
+    critical_css = render_css(prune_custom_properties(first_paint(critical_items)))
+    _write(DIST_DIR / "critical.css", critical_css + "\n", result)
+
+    app_js = (
+        BOOTSTRAP_JS.read_text(encoding="utf-8").replace("//# sourceMappingURL=bootstrap.bundle.min.js.map", "")
+        + "\n;\n"
+        + (STATIC_DIR / "js" / "main.js").read_text(encoding="utf-8")
+    )
+    _write(DIST_DIR / "app.js", app_js, result)
+    return result
@@ -0,0 +1,98 @@
+"""Usuario autenticado sem ida ao banco a cada requisicao.
+
+Com Redis, as sessoes usam o engine ``cached_db`` (cache ``sessions`` na
+frente da tabela). Aqui o usuario da sessao, ja com o ``profile``, fica no
+mesmo cache: com os dois quentes, a autenticacao nao faz nenhuma consulta
+(antes eram sessao + usuario + perfil). Sem Redis (``SESSION_CACHE=db``), a
+sessao vem da tabela e so o usuario sai do cache: uma consulta.
+
+A entrada so e usada se o hash de sessao (derivado da senha) bater com o da
+sessao; senao cai no ``django.contrib.auth.get_user``, que valida de novo e
+encerra a sessao se for o caso. Salvar/apagar User ou Profile apaga a entrada
+(ver core.signals); updates em massa precisam chamar ``forget_users``.
+
+``maybe_purge_sessions`` apaga as sessoes expiradas da tabela no maximo uma
+vez a cada ``SESSION_PURGE_SECONDS`` (uma vez para todos os workers).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+USER_TIMEOUT = 10 * 60
+PURGE_KEY = "core:sessions:purge"
+PURGE_CHECK_SECONDS = 60
+
+_next_purge_check = 0.0
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _key(user_id) -> str:
+    return f"core:auth:user:{user_id}"
+
+
+def get_cached_user(request):
+    """Mesmo resultado de ``auth.get_user``, lendo o usuario do cache quando possivel."""
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    if user_id is None or session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    user = _cache().get(_key(user_id))
+    if (
+        user is not None
+        and user.is_active
+        and constant_time_compare(session.get(HASH_SESSION_KEY, ""), user.get_session_auth_hash())
+    ):
+        return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        # Guarda o perfil junto (usado em quase todas as paginas)
+        getattr(user, "profile", None)
+        _cache().set(_key(user.pk), user, timeout=USER_TIMEOUT)
+    return user
+
+
+def forget_user(user_id) -> None:
+    _cache().delete(_key(user_id))
+
+
+def forget_users(user_ids) -> None:
+    _cache().delete_many([_key(user_id) for user_id in user_ids])
+
+
+def purge_expired_sessions() -> int:
+    deleted, _ = Session.objects.filter(expire_date__lt=timezone.now()).delete()
+    return deleted
+
+
+def _purge_in_background():
+    try:
+        purge_expired_sessions()
+    finally:
+        # Conexao desta thread; sem isso ficaria aberta ate o coletor
+        connection.close()
+
+
+def maybe_purge_sessions() -> None:
+    global _next_purge_check
+    interval = settings.SESSION_PURGE_SECONDS
+    now = time.monotonic()
+    if not interval or now < _next_purge_check:
+        return
+    # Consulta o cache compartilhado no maximo uma vez por minuto por worker
+    _next_purge_check = now + PURGE_CHECK_SECONDS
+    # add() so grava se a chave nao existe: um worker por intervalo
+    if _cache().add(PURGE_KEY, 1, timeout=interval):
+        threading.Thread(target=_purge_in_background, name="core-session-purge", daemon=True).start()
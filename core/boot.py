@@ -0,0 +1,82 @@
+"""Preparacao rapida do container antes do gunicorn (ver scripts/start.sh).
+
+- migrate so roda se o grafo de migracoes tiver algo pendente no banco;
+- collectstatic so roda se o hash dos arquivos de origem (finders do
+  staticfiles) mudou desde a ultima coleta ou se o manifest sumiu. O hash fica
+  em ``STATIC_ROOT/.sources-sha256``.
+
+Cada fase e cronometrada; ``prepare`` devolve a lista (fase, segundos, acao).
+"""
+import hashlib
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+STATIC_STAMP = ".sources-sha256"
+IGNORE_PATTERNS = ["CVS", ".*", "*~"]
+
+
+def pending_migrations() -> list:
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [migration for migration, backwards in plan]
+
+
+def static_sources_hash() -> str:
+    """Hash dos nomes e conteudos de tudo o que o collectstatic copiaria."""
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            # Como no collectstatic, vale o primeiro finder que encontra o caminho
+            files.setdefault(path, storage.path(path))
+    digest = hashlib.sha256()
+    # Mudancas de versao/configuracao tambem mudam o resultado da coleta
+    digest.update(f"{django.get_version()}|{settings.STORAGES['staticfiles']}|{settings.STATIC_URL}".encode())
+    for path in sorted(files):
+        digest.update(path.encode() + b"\0")
+        digest.update(Path(files[path]).read_bytes())
+    return digest.hexdigest()
+
+
+def _stamp_path() -> Path:
+    return Path(settings.STATIC_ROOT) / STATIC_STAMP
+
+
+def static_is_current(sources_hash: str) -> bool:
+    stamp = _stamp_path()
+    manifest = Path(settings.STATIC_ROOT) / getattr(staticfiles_storage, "manifest_name", "")
+    if not stamp.exists() or not manifest.is_file():
+        return False
+    return stamp.read_text().strip() == sources_hash
+
+
+def prepare(force: bool = False, verbosity: int = 1) -> list:
+    phases = []
+
+    started = time.perf_counter()
+    pending = pending_migrations()
+    if pending or force:
+        call_command("migrate", interactive=False, verbosity=verbosity)
+        action = f"{len(pending)} migracao(oes) aplicada(s)"
+    else:
+        action = "nada pendente"
+    phases.append(("migrate", time.perf_counter() - started, action))
+
+    started = time.perf_counter()
+    sources_hash = static_sources_hash()
+    if force or not static_is_current(sources_hash):
+        call_command("collectstatic", interactive=False, verbosity=verbosity)
+        _stamp_path().write_text(sources_hash + "\n")
+        action = "coletados"
+    else:
+        action = "inalterados"
+    phases.append(("collectstatic", time.perf_counter() - started, action))
+
+    return phases
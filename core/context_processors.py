@@ -1,13 +1,17 @@
 from datetime import date
 
-from .models import SiteSettings, Gift, Reservation
+from django.contrib.messages import get_messages
+
+from .models import SiteSettings
+from .stats import get_registry_stats, get_user_reserved_count
 
 
 def site_context(request):
     settings = SiteSettings.get_solo()
 
-    total_gifts = Gift.objects.filter(is_active=True).count()
-    reserved_gifts = Reservation.objects.count()
+    stats = getattr(request, "registry_stats", None) or get_registry_stats()
+    total_gifts = stats.total_active
+    reserved_gifts = stats.reserved
     reserved_percent = round((reserved_gifts / total_gifts) * 100, 1) if total_gifts else 0.0
 
     days_left = None
@@ -17,27 +21,17 @@ def site_context(request):
     my_reserved_count = 0
     admin_messages = None
     if request.user.is_authenticated:
-        my_reserved_count = Reservation.objects.filter(user=request.user).count()
+        my_reserved_count = get_user_reserved_count(request.user)
 
         profile = getattr(request.user, "profile", None)
         is_admin = request.user.is_staff or request.user.is_superuser or (profile and profile.is_event_admin)
         if is_admin:
-            base_qs = (
-                Reservation.objects.exclude(anonymous_message="")
-                .filter(message_hidden_for_admin=False)
-                .select_related("gift")
-                .order_by("-created_at")
-            )
-            unseen_qs = base_qs.filter(message_seen=False)
-            seen_qs = base_qs.filter(message_seen=True)
-            admin_messages = {
-                "unseen": list(unseen_qs),
-                "seen": list(seen_qs),
-                "unseen_count": unseen_qs.count(),
-                "seen_count": seen_qs.count(),
-            }
-
-    show_welcome_modal = bool(request.session.pop("show_welcome_modal", False))
+            # So a contagem; a caixa de mensagens carrega ao abrir o sino
+            admin_messages = {"unseen_count": stats.unseen_messages}
+
+    def show_welcome_modal():
+        # Avaliado no template depois da lista de avisos; o aviso de login/cadastro traz a marca
+        return any("welcome" in message.tags.split() for message in get_messages(request))
 
     return {
         "site_settings": settings,
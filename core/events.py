@@ -0,0 +1,177 @@
+"""Eventos de reserva em tempo real (Server-Sent Events).
+
+Os sinais de Reservation publicam ``gift-reserved``/``gift-released`` apos o
+commit (ver core.signals); ``catalogo_eventos`` repassa aos navegadores.
+
+- LocalBroker: fan-out dentro do processo. Cada conexao SSE e so uma
+  ``asyncio.Queue`` esperando no event loop (sem thread por cliente).
+- RedisBroker: publica no Redis e uma thread por processo repassa aos
+  assinantes locais; necessario com mais de um worker.
+
+O broker vem de ``settings.EVENTS_BROKER``. O streaming so funciona servido
+pelo ``chadepanela.asgi`` (ver scripts/start.sh); no WSGI a view responde 204
+e o navegador nao tenta reconectar.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 25
+RETRY_MILLISECONDS = 5000
+REDIS_CHANNEL = "core:events"
+
+
+class Subscription:
+    def __init__(self, broker):
+        self._broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event):
+        # Roda no loop do assinante; cliente lento perde os eventos mais antigos
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def fan_out(self, event: dict):
+        """Entrega ``event`` a todos os assinantes deste processo (thread-safe)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Loop ja encerrado
+                self.unsubscribe(subscription)
+
+    def has_listeners(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, event: dict):
+        self.fan_out(event)
+
+
+class RedisBroker(LocalBroker):
+    def __init__(self):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        self._listener = None
+
+    def subscribe(self) -> Subscription:
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name="core-events", daemon=True)
+                    self._listener.start()
+        return super().subscribe()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(REDIS_CHANNEL)
+        for message in pubsub.listen():
+            try:
+                self.fan_out(json.loads(message["data"]))
+            except (TypeError, ValueError):
+                continue
+
+    def has_listeners(self) -> bool:
+        # Os assinantes podem estar em outros processos
+        return True
+
+    def publish(self, event: dict):
+        self._redis.publish(REDIS_CHANNEL, json.dumps(event))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def publish_gift_event(gift_id: int, reserved: bool):
+    """Monta e publica o evento de um presente (chamado apos o commit)."""
+    from django.template.loader import render_to_string
+
+    from .fragments import attach_fragments
+    from .models import Gift
+    from .stats import get_global_counts
+
+    broker = get_broker()
+    if not broker.has_listeners():
+        return
+
+    gift = Gift.objects.filter(pk=gift_id, is_active=True).first()
+    card_html = ""
+    if gift is not None:
+        # Versao anonima do card (sem "reservado por voce" nem nome de quem reservou)
+        # (o observador busca o proprio em presente_card)
+        gift.reserved = reserved
+        gift.reserved_by_me = False
+        attach_fragments("card", [gift], "guest")
+        card_html = render_to_string("catalogo/_gifts.html", {"gifts": [gift]})
+
+    counts = get_global_counts()
+    broker.publish(
+        {
+            "type": "gift-reserved" if reserved else "gift-released",
+            "gift_id": gift_id,
+            "card_html": card_html,
+            "total_gifts": counts["total_gifts"],
+            "reserved_gifts": counts["reserved_gifts"],
+        }
+    )
+
+
+def _format(event: dict) -> bytes:
+    data = {key: value for key, value in event.items() if key != "type"}
+    return f"event: {event['type']}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def stream():
+    """Corpo da resposta SSE: eventos do broker e um comentario de keep-alive."""
+    subscription = get_broker().subscribe()
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+        while True:
+            event = await subscription.get(KEEPALIVE_SECONDS)
+            yield b": keep-alive\n\n" if event is None else _format(event)
+    finally:
+        subscription.close()
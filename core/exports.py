@@ -0,0 +1,90 @@
+"""Exportacao das reservas (quem reservou o que + mensagens) em CSV ou XLSX.
+
+As linhas saem de um ``values_list(...).iterator(chunk_size=...)``: o uso de
+memoria nao cresce com o numero de reservas. O CSV e gerado enquanto a
+resposta e enviada; o XLSX e gravado com o openpyxl em modo ``write_only``
+(linhas vao direto para um arquivo temporario) e depois enviado em pedacos.
+"""
+import csv
+import tempfile
+
+from django.utils import timezone
+
+from .models import Reservation
+
+CHUNK_SIZE = 500
+HEADER = ["Presente", "Reservado por", "Email", "Telefone", "Mensagem", "Mensagem oculta para o admin", "Reservado em"]
+FIELDS = (
+    "gift__title",
+    "user__first_name",
+    "user__last_name",
+    "user__username",
+    "user__email",
+    "user__profile__phone_number",
+    "anonymous_message",
+    "message_hidden_for_admin",
+    "created_at",
+)
+# Planilhas executam celulas que comecam com estes caracteres como formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def reservation_queryset(lookup=None, with_message: bool = False):
+    qs = Reservation.objects.order_by("gift__title", "id")
+    if lookup is not None:
+        qs = qs.filter(lookup)
+    if with_message:
+        qs = qs.exclude(anonymous_message="")
+    return qs.values_list(*FIELDS)
+
+
+def _safe(value: str) -> str:
+    if value and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def reservation_rows(queryset):
+    for title, first_name, last_name, username, email, phone, message, hidden, created_at in queryset.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        name = f"{first_name} {last_name}".strip() or username or "Convidado"
+        yield [
+            _safe(title),
+            _safe(name),
+            _safe(email),
+            phone or "",
+            _safe(message),
+            "sim" if hidden else "nao",
+            timezone.localtime(created_at).strftime("%d/%m/%Y %H:%M"),
+        ]
+
+
+class _Echo:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de guardar."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    writer = csv.writer(_Echo())
+    # BOM: o Excel abre o UTF-8 com acentos corretos
+    yield "\ufeff" + writer.writerow(HEADER)
+    for row in reservation_rows(queryset):
+        yield writer.writerow(row)
+
+
+def write_xlsx(queryset):
+    """Grava a planilha em um arquivo temporario e o devolve aberto no inicio."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Reservas")
+    sheet.append(HEADER)
+    for row in reservation_rows(queryset):
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -1,9 +1,10 @@
 from django import forms
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.forms import SetPasswordForm
+from django.db.models import Case, IntegerField, Q, Value, When
 
 from .models import Gift, SiteSettings, Profile
-from .services import normalize_phone
+from .services import identifier_key, normalize_phone
 
 User = get_user_model()
 
@@ -51,24 +52,44 @@ class LoginForm(forms.Form):
     def get_user(self):
         return self.user_cache
 
+    LOOKUP_LIMIT = 5
+
     def _find_user(self, identifier: str):
+        """Resolve email, telefone, username ou nome em uma unica consulta.
+
+        As colunas normalizadas de Profile (e o telefone) sao indexadas; a
+        prioridade e a mesma de antes: email (ou telefone), username e, por
+        ultimo, o nome, apenas se for unico. A prioridade vai no ORDER BY,
+        antes do LIMIT: muitos homonimos nao escondem o username/email exato.
+        """
+        key = identifier_key(identifier)
+        lookup = Q(username_key=key) | Q(name_key=key)
+        whens = []
         if "@" in identifier:
-            user = User.objects.filter(email__iexact=identifier).first()
-            if user:
-                return user
+            lookup |= Q(email_key=key)
+            whens.append(When(email_key=key, then=Value(0)))
         else:
             phone_norm = normalize_phone(identifier)
             if phone_norm:
-                profile = Profile.objects.filter(phone_number=phone_norm).select_related("user").first()
-                if profile:
-                    return profile.user
-        user = User.objects.filter(username__iexact=identifier).first()
-        if user:
-            return user
-        qs = User.objects.filter(first_name__iexact=identifier)
-        if qs.count() == 1:
-            return qs.first()
-        return None
+                lookup |= Q(phone_number=phone_norm)
+                whens.append(When(phone_number=phone_norm, then=Value(0)))
+        whens.append(When(username_key=key, then=Value(1)))
+
+        priority = Case(*whens, default=Value(2), output_field=IntegerField())
+        profiles = list(
+            Profile.objects.filter(lookup)
+            .annotate(match_priority=priority)
+            .select_related("user")
+            .order_by("match_priority", "pk")[: self.LOOKUP_LIMIT]
+        )
+        if not profiles:
+            return None
+        match = profiles[0]
+        if match.match_priority == 2:
+            # So homonimos: o nome vale apenas se for unico (e a lista nao foi truncada)
+            if len(profiles) != 1:
+                return None
+        return match.user
 
 
 class RegistrationForm(forms.Form):
@@ -111,24 +132,31 @@ class RegistrationForm(forms.Form):
         if p1 and p2 and p1 != p2:
             raise forms.ValidationError("As senhas nao conferem.")
 
+        # Email e telefone em uma unica consulta (colunas indexadas de Profile)
         existing_user = None
-        if email:
-            existing_user = User.objects.filter(email__iexact=email).first()
-            if existing_user and existing_user.has_usable_password():
+        profiles = []
+        if email or phone:
+            lookup = Q()
+            if email:
+                lookup |= Q(email_key=email)
+            if phone:
+                lookup |= Q(phone_number=phone)
+            profiles = list(Profile.objects.filter(lookup).select_related("user"))
+
+        email_profile = next((p for p in profiles if email and p.email_key == email), None)
+        if email_profile:
+            existing_user = email_profile.user
+            if existing_user.has_usable_password():
                 raise forms.ValidationError("Ja existe uma conta com este email.")
 
-        if phone:
-            profile = Profile.objects.filter(phone_number=phone).select_related("user").first()
-            if profile:
-                phone_user = profile.user
-                if existing_user and existing_user != phone_user:
-                    raise forms.ValidationError("Email e telefone pertencem a contas diferentes.")
-                if phone_user.has_usable_password():
-                    raise forms.ValidationError("Este telefone ja esta associado a outra conta.")
-                existing_user = phone_user
-            else:
-                if existing_user and Profile.objects.filter(phone_number=phone).exclude(user=existing_user).exists():
-                    raise forms.ValidationError("Este telefone ja esta associado a outra conta.")
+        phone_profile = next((p for p in profiles if phone and p.phone_number == phone), None)
+        if phone_profile:
+            phone_user = phone_profile.user
+            if existing_user and existing_user != phone_user:
+                raise forms.ValidationError("Email e telefone pertencem a contas diferentes.")
+            if phone_user.has_usable_password():
+                raise forms.ValidationError("Este telefone ja esta associado a outra conta.")
+            existing_user = phone_user
 
         self.existing_user = existing_user
         cleaned["email"] = email
@@ -180,6 +208,53 @@ class SiteSettingsForm(forms.ModelForm):
         }
 
 
+class GuestImportForm(forms.Form):
+    arquivo = forms.FileField(
+        label="Planilha de convidados (CSV ou XLSX)",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.xlsx"}),
+    )
+    dry_run = forms.BooleanField(
+        label="Apenas simular (nao cria contas)",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data["arquivo"]
+        if not arquivo.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("Envie um arquivo .csv ou .xlsx.")
+        return arquivo
+
+
+class GiftImportForm(forms.Form):
+    arquivo = forms.FileField(
+        label="Arquivo .zip com as imagens (e o manifesto, se nao for enviado abaixo)",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".zip"}),
+    )
+    manifesto = forms.FileField(
+        label="Manifesto (JSON ou CSV, opcional)",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".json,.csv"}),
+    )
+    dry_run = forms.BooleanField(
+        label="Apenas validar (nao cria presentes)",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data["arquivo"]
+        if not arquivo.name.lower().endswith(".zip"):
+            raise forms.ValidationError("Envie um arquivo .zip.")
+        return arquivo
+
+    def clean_manifesto(self):
+        manifesto = self.cleaned_data.get("manifesto")
+        if manifesto and not manifesto.name.lower().endswith((".json", ".csv")):
+            raise forms.ValidationError("O manifesto deve ser .json ou .csv.")
+        return manifesto
+
+
 class SetupForm(forms.Form):
     site_title = forms.CharField(
         label="Titulo do site",
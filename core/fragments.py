@@ -0,0 +1,160 @@
+"""Cache dos pedacos de HTML dos presentes (card do catalogo e modal de detalhes).
+
+Imagens, titulo, descricao e links de compra saem iguais para todos que veem o
+presente no mesmo estado, entao sao renderizados uma vez e guardados no cache
+compartilhado. O que e de quem esta vendo ("reservado por voce", botoes com
+CSRF) e montado por cima nos templates.
+
+Chave: (versao, tipo, presente, papel de quem ve). A versao junta o
+``RELEASE_ID`` e o hash dos templates dos fragmentos: um deploy que muda o
+markup nao serve o HTML antigo que ficou no Redis/arquivo. O valor guarda o
+carimbo com que foi gerado (``updated_at`` + estado da reserva e, para o
+observador, o nome de quem reservou); carimbo diferente conta como miss. Os
+sinais de Gift/Reservation apagam as entradas do presente apos o commit.
+Hits/misses por worker aparecem em /painel/desempenho/.
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = 6 * 60 * 60
+ROLES = ("guest", "observer")
+PARTS = {
+    "card": {
+        "media": "catalogo/_card_media.html",
+        "body": "catalogo/_card_body.html",
+    },
+    "detail": {
+        "gallery": "catalogo/_detalhe_galeria.html",
+        "info": "catalogo/_detalhe_info.html",
+    },
+}
+# Incluidos pelos templates de PARTS
+INCLUDED_TEMPLATES = ("catalogo/_imagem.html",)
+PUBLISH_SECONDS = 10
+WORKERS_KEY = "core:fragments:workers"
+WORKER_KEY = "core:fragments:worker:{pid}"
+WORKER_TIMEOUT = 10 * 60
+
+
+def viewer_role(user) -> str:
+    profile = getattr(user, "profile", None)
+    return "observer" if profile and profile.is_observer else "guest"
+
+
+@functools.lru_cache(maxsize=1)
+def templates_version() -> str:
+    """Deploy + conteudo dos templates dos fragmentos (calculado uma vez por processo)."""
+    digest = hashlib.sha256(settings.RELEASE_ID.encode())
+    names = [template for parts in PARTS.values() for template in parts.values()]
+    for name in sorted(names) + list(INCLUDED_TEMPLATES):
+        digest.update(b"\0" + get_template(name).template.source.encode())
+    return digest.hexdigest()[:12]
+
+
+def _key(kind: str, gift_id: int, role: str) -> str:
+    return f"core:fragment:{templates_version()}:{kind}:{gift_id}:{role}"
+
+
+def _stamp(gift, role: str):
+    if role == "observer":
+        # O observador ve quem reservou: o nome entra no carimbo (o convidado pode mudar o perfil)
+        reservation = getattr(gift, "reservation", None)
+        state = (reservation.pk, reservation.reserver_name) if reservation is not None else 0
+    else:
+        state = bool(gift.reserved)
+    return (gift.updated_at.isoformat(), state)
+
+
+def attach_fragments(kind: str, gifts, role: str):
+    """Preenche ``gift.fragment`` (dict de HTML) com um ``get_many`` para a lista toda."""
+    gifts = list(gifts)
+    if not gifts:
+        return gifts
+    keys = {gift.pk: _key(kind, gift.pk, role) for gift in gifts}
+    cached = cache.get_many(keys.values())
+    missing = {}
+    for gift in gifts:
+        stamp = _stamp(gift, role)
+        entry = cached.get(keys[gift.pk])
+        if entry is not None and entry[0] == stamp:
+            parts = entry[1]
+        else:
+            context = {"gift": gift, "observer": role == "observer"}
+            parts = {name: render_to_string(template, context) for name, template in PARTS[kind].items()}
+            missing[keys[gift.pk]] = (stamp, parts)
+        gift.fragment = {name: mark_safe(html) for name, html in parts.items()}
+    if missing:
+        cache.set_many(missing, timeout=FRAGMENT_TIMEOUT)
+    fragment_stats.record(kind, hits=len(gifts) - len(missing), misses=len(missing))
+    return gifts
+
+
+def forget_gift(gift_id: int) -> None:
+    cache.delete_many([_key(kind, gift_id, role) for kind in PARTS for role in ROLES])
+
+
+class FragmentStats:
+    """Hits/misses deste worker; publicados no cache a cada PUBLISH_SECONDS."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._published_at = 0.0
+
+    def record(self, kind: str, hits: int, misses: int):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits"] += hits
+            counts["misses"] += misses
+        self.maybe_publish()
+
+    def maybe_publish(self):
+        now = time.monotonic()
+        if now - self._published_at < PUBLISH_SECONDS:
+            return
+        self.publish()
+
+    def publish(self):
+        self._published_at = time.monotonic()
+        pid = os.getpid()
+        with self._lock:
+            snapshot = {kind: dict(counts) for kind, counts in self._counts.items()}
+        cache.set(WORKER_KEY.format(pid=pid), snapshot, timeout=WORKER_TIMEOUT)
+        workers = set(cache.get(WORKERS_KEY) or ())
+        if pid not in workers:
+            workers.add(pid)
+            cache.set(WORKERS_KEY, workers, timeout=None)
+
+
+fragment_stats = FragmentStats()
+
+
+def summary():
+    """Hits/misses por tipo, somando os workers que publicaram no cache."""
+    fragment_stats.publish()
+    rows = {kind: {"kind": kind, "hits": 0, "misses": 0} for kind in PARTS}
+    workers = set(cache.get(WORKERS_KEY) or ())
+    alive = set()
+    for pid in workers:
+        data = cache.get(WORKER_KEY.format(pid=pid))
+        if data is None:
+            continue
+        alive.add(pid)
+        for kind, counts in data.items():
+            row = rows.setdefault(kind, {"kind": kind, "hits": 0, "misses": 0})
+            row["hits"] += counts["hits"]
+            row["misses"] += counts["misses"]
+    if alive != workers:
+        cache.set(WORKERS_KEY, alive, timeout=None)
+    for row in rows.values():
+        total = row["hits"] + row["misses"]
+        row["hit_rate"] = round(row["hits"] * 100 / total, 1) if total else 0.0
+    return {"kinds": list(rows.values()), "workers": len(alive)}
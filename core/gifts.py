@@ -0,0 +1,394 @@
+"""Importacao e exportacao do catalogo de presentes.
+
+Formato: um ``.zip`` com ``manifest.json`` (ou ``manifest.csv``) e as imagens.
+Cada item do manifesto tem ``title``, ``description``, ``purchase_links``,
+``is_active`` e ``image``/``image_2``/``image_3`` (nomes de arquivos do zip).
+O manifesto tambem pode ser enviado separado do zip.
+
+A importacao valida tudo antes de gravar: o manifesto inteiro, a existencia
+das imagens no zip e a decodificacao/redimensionamento delas (no comando
+importar_presentes, em um pool de processos ``spawn``). So entao grava os
+arquivos e cria os presentes com um unico ``bulk_create`` em uma transacao.
+Se a gravacao ou a transacao levantar excecao, os arquivos ja gravados que
+nenhum presente usa sao apagados. Os arquivos sao gravados antes da
+transacao: se o processo morrer no meio, eles ficam orfaos no storage.
+
+A exportacao e gerada em streaming, sem montar o zip em memoria ou em disco.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import posixpath
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from . import search
+from .images import IMAGE_FIELDS, delete_unreferenced, render_zip_member, save_variants, variant_names
+from .models import Gift
+from .stats import record_gift_change
+
+MANIFEST_NAMES = ("manifest.json", "manifest.csv")
+EXPORT_IMAGE_DIR = "images"
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_PROCESSES = 4
+EXPORT_CHUNK_SIZE = 64 * 1024
+TRUE_VALUES = {"1", "true", "sim", "s", "yes", "y", "x"}
+FALSE_VALUES = {"0", "false", "nao", "n", "no", ""}
+
+
+class GiftFileError(Exception):
+    pass
+
+
+@dataclass
+class GiftImportResult:
+    created: int = 0
+    images: int = 0
+    skipped: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+
+# ----------------------------------------------------------------------
+# Leitura
+
+
+def _parse_manifest(raw: bytes, filename: str):
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+
+    if filename.lower().endswith(".json"):
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            raise GiftFileError(f"Manifesto JSON invalido: {exc}")
+        if isinstance(data, dict):
+            data = data.get("gifts")
+        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+            raise GiftFileError("O manifesto JSON deve ser uma lista de presentes.")
+        return [{"line": i, **item} for i, item in enumerate(data, start=1)]
+
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not reader.fieldnames or "title" not in [(f or "").strip().lower() for f in reader.fieldnames]:
+        raise GiftFileError("O manifesto CSV precisa de uma coluna 'title'.")
+    rows = []
+    for line, row in enumerate(reader, start=2):
+        rows.append({"line": line, **{(k or "").strip().lower(): v for k, v in row.items()}})
+    return rows
+
+
+def read_manifest(archive, manifest_file=None, manifest_name: str = ""):
+    """Linhas do manifesto: do arquivo enviado ou de dentro do zip."""
+    if manifest_file is not None:
+        return _parse_manifest(manifest_file.read(), manifest_name)
+    names = set(archive.namelist())
+    for name in MANIFEST_NAMES:
+        if name in names:
+            return _parse_manifest(archive.read(name), name)
+    raise GiftFileError("Nenhum manifesto encontrado (manifest.json ou manifest.csv no zip).")
+
+
+@contextmanager
+def archive_path(uploaded):
+    """Caminho em disco do zip enviado (os processos do pool abrem o arquivo)."""
+    if hasattr(uploaded, "temporary_file_path"):
+        yield uploaded.temporary_file_path()
+        return
+    with tempfile.NamedTemporaryFile(suffix=".zip") as tmp:
+        for chunk in uploaded.chunks():
+            tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
+
+
+def open_archive(path: str):
+    try:
+        return zipfile.ZipFile(path)
+    except (zipfile.BadZipFile, OSError):
+        raise GiftFileError("Nao foi possivel abrir o arquivo zip.")
+
+
+# ----------------------------------------------------------------------
+# Validacao
+
+
+def _as_bool(value, line, result):
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return True
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    result.errors.append((line, f"is_active invalido: {value}"))
+    return None
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(str(v).strip() for v in value if str(v).strip())
+    return str(value).strip()
+
+
+def _member_index(archive):
+    """Nome no zip por caminho completo e por nome do arquivo."""
+    index = {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        index.setdefault(info.filename, info)
+        index.setdefault(posixpath.basename(info.filename), info)
+    return index
+
+
+def _validate(rows, archive, result):
+    members = _member_index(archive)
+    existing = {title.casefold() for title in Gift.objects.values_list("title", flat=True)}
+    seen = set()
+    gifts = []
+    for row in rows:
+        line = row["line"]
+        title = _as_text(row.get("title"))
+        if not title:
+            result.errors.append((line, "Informe o titulo."))
+            continue
+        if len(title) > Gift._meta.get_field("title").max_length:
+            result.errors.append((line, f"Titulo longo demais: {title[:40]}..."))
+            continue
+        key = title.casefold()
+        if key in existing:
+            result.skipped.append((line, f"Ja existe um presente '{title}'."))
+            continue
+        if key in seen:
+            result.skipped.append((line, f"'{title}' repetido no manifesto."))
+            continue
+        is_active = _as_bool(row.get("is_active"), line, result)
+        if is_active is None:
+            continue
+
+        images = {}
+        for field_name in IMAGE_FIELDS:
+            name = _as_text(row.get(field_name))
+            if not name:
+                continue
+            info = members.get(name) or members.get(posixpath.basename(name))
+            if info is None:
+                result.errors.append((line, f"Imagem nao encontrada no zip: {name}"))
+            elif info.file_size > MAX_IMAGE_BYTES:
+                result.errors.append((line, f"Imagem maior que {MAX_IMAGE_BYTES // (1024 * 1024)} MB: {name}"))
+            else:
+                images[field_name] = info.filename
+
+        seen.add(key)
+        gifts.append(
+            {
+                "line": line,
+                "title": title,
+                "description": _as_text(row.get("description")),
+                "purchase_links": _as_text(row.get("purchase_links")),
+                "is_active": is_active,
+                "images": images,
+            }
+        )
+    return gifts
+
+
+# ----------------------------------------------------------------------
+# Imagens (pool de processos)
+
+
+def _process_images(path: str, members, processes: int):
+    results = {}
+    errors = {}
+    if not members:
+        return results, errors
+    if processes <= 1 or len(members) == 1:
+        for member in members:
+            try:
+                results[member] = render_zip_member(path, member)
+            except Exception as exc:  # noqa: BLE001 - Pillow levanta varios tipos
+                errors[member] = exc
+        return results, errors
+
+    # spawn: processos novos, sem copiar locks/threads/conexoes do worker (fork)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(processes, len(members)), mp_context=context) as pool:
+        futures = {member: pool.submit(render_zip_member, path, member) for member in members}
+        for member, future in futures.items():
+            try:
+                results[member] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                errors[member] = exc
+    return results, errors
+
+
+def _store_image(archive, member: str, rendered):
+    """Grava original + miniaturas; retorna (nome do original, entrada de image_variants)."""
+    field = Gift._meta.get_field("image")
+    name = field.storage.save(
+        field.generate_filename(None, posixpath.basename(member)),
+        ContentFile(archive.read(member)),
+    )
+    return name, save_variants(name, rendered)
+
+
+# ----------------------------------------------------------------------
+# Importacao
+
+
+def import_gifts(path: str, manifest_file=None, manifest_name: str = "", dry_run: bool = False, processes=None):
+    """Importa os presentes do zip em ``path``; nada e criado se houver erros."""
+    result = GiftImportResult()
+    with open_archive(path) as archive:
+        rows = read_manifest(archive, manifest_file, manifest_name)
+        gifts = _validate(rows, archive, result)
+
+        members = sorted({m for gift in gifts for m in gift["images"].values()})
+        if processes is None:
+            processes = min(MAX_PROCESSES, os.cpu_count() or 1)
+        processed, failed = _process_images(path, members, processes)
+        for gift in gifts:
+            for member in gift["images"].values():
+                if member in failed:
+                    result.errors.append((gift["line"], f"Imagem invalida: {member}"))
+
+        if result.errors:
+            result.errors.sort()
+            return result
+        result.created = len(gifts)
+        result.images = len(members)
+        if dry_run or not gifts:
+            return result
+
+        # Arquivos com hash no nome: reimportar reaproveita os mesmos arquivos
+        stored = {}
+        try:
+            for member in members:
+                stored[member] = _store_image(archive, member, processed[member])
+            _create_gifts(gifts, stored)
+        except BaseException:
+            # Nenhum presente criado: apaga os arquivos gravados que nenhum presente usa
+            names = set()
+            for name, entry in stored.values():
+                names |= {name, *variant_names(entry)}
+            delete_unreferenced(names, Gift.objects.all())
+            raise
+    return result
+
+
+def _create_gifts(gifts, stored):
+    objs = []
+    for gift in gifts:
+        obj = Gift(
+            title=gift["title"],
+            description=gift["description"],
+            purchase_links=gift["purchase_links"],
+            is_active=gift["is_active"],
+        )
+        variants = {}
+        for field_name, member in gift["images"].items():
+            name, entry = stored[member]
+            setattr(obj, field_name, name)
+            variants[field_name] = entry
+        obj.image_variants = variants
+        objs.append(obj)
+
+    with transaction.atomic():
+        Gift.objects.bulk_create(objs, batch_size=200)
+        # bulk_create nao dispara post_save: indice de busca e contadores aqui
+        search.rebuild_index()
+        record_gift_change()
+
+
+# ----------------------------------------------------------------------
+# Exportacao
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Destino nao-posicionavel para o ZipFile: acumula bytes ate o proximo yield."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_gifts(queryset=None):
+    """Gera o zip (imagens + manifest.json) em pedacos, para StreamingHttpResponse."""
+    if queryset is None:
+        queryset = Gift.objects.order_by("id")
+    queryset = queryset.only("id", "title", "description", "purchase_links", "is_active", *IMAGE_FIELDS)
+
+    buffer = _StreamBuffer()
+    manifest = []
+    written = set()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for gift in queryset.iterator(chunk_size=100):
+            item = {
+                "title": gift.title,
+                "description": gift.description,
+                "purchase_links": gift.purchase_links,
+                "is_active": gift.is_active,
+            }
+            for field_name in IMAGE_FIELDS:
+                file_obj = getattr(gift, field_name)
+                if not file_obj:
+                    continue
+                member = f"{EXPORT_IMAGE_DIR}/{posixpath.basename(file_obj.name)}"
+                if member not in written:
+                    try:
+                        size = file_obj.storage.size(file_obj.name)
+                        source = file_obj.storage.open(file_obj.name, "rb")
+                    except OSError:
+                        continue
+                    info = zipfile.ZipInfo(member)
+                    info.file_size = size
+                    # Imagens ja sao comprimidas: ZIP_STORED
+                    with source, archive.open(info, "w") as target:
+                        while True:
+                            chunk = source.read(EXPORT_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            target.write(chunk)
+                            yield buffer.take()
+                    written.add(member)
+                item[field_name] = member
+            manifest.append(item)
+        archive.writestr(
+            "manifest.json",
+            json.dumps(manifest, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+    yield buffer.take()
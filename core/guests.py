@@ -0,0 +1,211 @@
+"""Importacao em lote de convidados (CSV ou XLSX).
+
+Colunas reconhecidas (cabecalho, sem diferenciar maiusculas): ``nome``,
+``email`` e ``telefone``. Cada convidado precisa de email ou telefone.
+Usuarios e perfis sao criados com ``bulk_create`` (sem sinais por linha) e
+com senha inutilizavel: no cadastro, o convidado apenas define a senha.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .models import Profile
+from .services import identifier_key, normalize_phone, unique_username, user_lookup_keys
+
+User = get_user_model()
+
+BATCH_SIZE = 200
+COLUMN_ALIASES = {
+    "nome": "name",
+    "name": "name",
+    "nome completo": "name",
+    "email": "email",
+    "e-mail": "email",
+    "telefone": "phone",
+    "celular": "phone",
+    "phone": "phone",
+}
+
+
+class GuestFileError(Exception):
+    pass
+
+
+@dataclass
+class GuestImportResult:
+    created: int = 0
+    skipped: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+
+def _map_header(header):
+    mapped = [COLUMN_ALIASES.get((col or "").strip().lower()) for col in header]
+    if "email" not in mapped and "phone" not in mapped:
+        raise GuestFileError("O arquivo precisa de uma coluna 'email' ou 'telefone'.")
+    return mapped
+
+
+def _rows_from_table(table):
+    rows = iter(table)
+    try:
+        header = next(rows)
+    except StopIteration:
+        return []
+    mapped = _map_header(header)
+    result = []
+    for line, row in enumerate(rows, start=2):
+        item = {"line": line, "name": "", "email": "", "phone": ""}
+        for key, value in zip(mapped, row):
+            if key and value is not None:
+                item[key] = str(value).strip()
+        if item["name"] or item["email"] or item["phone"]:
+            result.append(item)
+    return result
+
+
+def read_guest_rows(file_obj, filename: str):
+    """Le um CSV (virgula ou ponto e virgula) ou XLSX e devolve as linhas."""
+    if filename.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise GuestFileError("Leitura de XLSX requer o pacote openpyxl.")
+        try:
+            workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        except Exception:  # noqa: BLE001 - openpyxl levanta varios tipos
+            raise GuestFileError("Nao foi possivel ler a planilha XLSX.")
+        try:
+            return _rows_from_table(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+    raw = file_obj.read()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return _rows_from_table(csv.reader(io.StringIO(text), dialect))
+
+
+def _normalize(rows, result):
+    seen_emails = set()
+    seen_phones = set()
+    guests = []
+    for row in rows:
+        email = row["email"].lower()
+        phone = normalize_phone(row["phone"]) if row["phone"] else ""
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                result.errors.append((row["line"], f"Email invalido: {row['email']}"))
+                continue
+        if row["phone"] and not phone:
+            result.errors.append((row["line"], f"Telefone invalido: {row['phone']}"))
+            continue
+        if not email and not phone:
+            result.errors.append((row["line"], "Informe email ou telefone."))
+            continue
+        if (email and email in seen_emails) or (phone and phone in seen_phones):
+            result.skipped.append((row["line"], "Repetido no arquivo."))
+            continue
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        guests.append({"line": row["line"], "name": row["name"][:150], "email": email, "phone": phone})
+    return guests
+
+
+def _existing_values(field_name: str, values, chunk: int = 500) -> set:
+    found = set()
+    for start in range(0, len(values), chunk):
+        lookup = {f"{field_name}__in": values[start : start + chunk]}
+        found.update(Profile.objects.filter(**lookup).values_list(field_name, flat=True))
+    return found
+
+
+def import_guests(rows, dry_run: bool = False) -> GuestImportResult:
+    """Cria os convidados que ainda nao existem (por email ou telefone)."""
+    result = GuestImportResult()
+    guests = _normalize(rows, result)
+    if not guests:
+        return result
+
+    existing_emails = _existing_values("email_key", [g["email"] for g in guests if g["email"]])
+    existing_phones = _existing_values("phone_number", [g["phone"] for g in guests if g["phone"]])
+
+    # Todos os usernames em uso em uma consulta; colisoes resolvidas em memoria
+    taken = {identifier_key(u) for u in User.objects.values_list("username", flat=True)}
+
+    new_users = []
+    phones_by_username = {}
+    guests_by_username = {}
+    for guest in guests:
+        if guest["email"] in existing_emails or guest["phone"] in existing_phones:
+            result.skipped.append((guest["line"], "Convidado ja cadastrado."))
+            continue
+        username = unique_username(guest["email"] or guest["phone"], taken)
+        new_users.append(
+            User(
+                username=username,
+                email=guest["email"],
+                first_name=guest["name"],
+                password=make_password(None),
+            )
+        )
+        phones_by_username[username] = guest["phone"] or None
+        guests_by_username[username] = guest
+
+    result.created = len(new_users)
+    if dry_run or not new_users:
+        return result
+
+    try:
+        with transaction.atomic():
+            for start in range(0, len(new_users), BATCH_SIZE):
+                batch = new_users[start : start + BATCH_SIZE]
+                created = User.objects.bulk_create(batch)
+                if any(u.pk is None for u in created):
+                    # Backend sem RETURNING no bulk insert: busca os ids pelo username
+                    ids = dict(
+                        User.objects.filter(username__in=[u.username for u in batch]).values_list("username", "id")
+                    )
+                    for user in created:
+                        user.pk = ids[user.username]
+                Profile.objects.bulk_create(
+                    [
+                        Profile(user=user, phone_number=phones_by_username[user.username], **user_lookup_keys(user))
+                        for user in created
+                    ]
+                )
+    except IntegrityError:
+        # Um cadastro ou outra importacao usou o mesmo username/telefone depois da
+        # consulta acima; a transacao foi desfeita e nenhum convidado foi criado
+        result.created = 0
+        _report_conflicts(guests_by_username, result)
+    return result
+
+
+def _report_conflicts(guests_by_username: dict, result: GuestImportResult) -> None:
+    guests = list(guests_by_username.values())
+    taken = set(User.objects.filter(username__in=list(guests_by_username)).values_list("username", flat=True))
+    emails = _existing_values("email_key", [g["email"] for g in guests if g["email"]])
+    phones = _existing_values("phone_number", [g["phone"] for g in guests if g["phone"]])
+    conflicts = [
+        guest["line"]
+        for username, guest in guests_by_username.items()
+        if username in taken or guest["email"] in emails or guest["phone"] in phones
+    ]
+    reason = "Cadastrado por outra pessoa durante a importacao."
+    for line in sorted(conflicts):
+        result.errors.append((line, reason))
+    result.errors.append(("-", "Conflito com um cadastro simultaneo; nenhum convidado foi importado. Importe de novo."))
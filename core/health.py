@@ -0,0 +1,75 @@
+"""Probes de liveness (/healthz) e readiness (/readyz).
+
+Respondidos por core.middleware.HealthCheckMiddleware, o primeiro da cadeia:
+nao passam por sessao, autenticacao, mensagens, CSRF, ALLOWED_HOSTS nem
+templates.
+
+O readiness faz ``SELECT 1`` em uma thread propria e espera no maximo
+``PING_TIMEOUT``; o resultado vale por ``PING_CACHE_SECONDS`` neste processo.
+Enquanto um ping travado nao termina, nenhum outro e disparado.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.db import connection
+
+LIVE_PATH = "/healthz"
+READY_PATH = "/readyz"
+PING_TIMEOUT = 2.0
+PING_CACHE_SECONDS = 5.0
+
+
+def _ping() -> bool:
+    try:
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return True
+    except Exception:
+        # Conexao quebrada: o proximo ping reconecta
+        connection.close()
+        return False
+
+
+class DatabaseProbe:
+    def __init__(self):
+        # RLock: add_done_callback chama _finished na hora se o ping ja terminou
+        self._lock = threading.RLock()
+        self._executor = None
+        self._pending = None
+        self._result = None
+        self._checked_at = 0.0
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            if self._result is not None and time.monotonic() - self._checked_at < PING_CACHE_SECONDS:
+                return self._result
+            if self._pending is None:
+                if self._executor is None:
+                    # Criado sob demanda: depois do fork do gunicorn, uma thread por worker
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="core-readyz")
+                self._pending = self._executor.submit(_ping)
+                self._pending.add_done_callback(self._finished)
+            pending = self._pending
+
+        try:
+            return pending.result(timeout=PING_TIMEOUT)
+        except FutureTimeout:
+            self._store(False)
+            return False
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending = None
+        self._store(future.result())
+
+    def _store(self, result: bool):
+        with self._lock:
+            self._result = result
+            self._checked_at = time.monotonic()
+
+
+database_probe = DatabaseProbe()
@@ -0,0 +1,156 @@
+import io
+import os
+import re
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .storage import HASH_LENGTH
+
+IMAGE_FIELDS = ("image", "image_2", "image_3")
+VARIANT_WIDTHS = (320, 640, 1024)
+VARIANT_DIR = "gifts/variants"
+WEBP_QUALITY = 78
+JPEG_QUALITY = 80
+
+
+def _encode(img, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _flatten(img):
+    """JPEG nao tem transparencia: aplica fundo branco."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return img.convert("RGB")
+
+
+def render_zip_member(path: str, member: str) -> list:
+    """Le uma imagem do zip e roda render_variants (usado no pool de core.gifts)."""
+    with zipfile.ZipFile(path) as archive:
+        data = archive.read(member)
+    return render_variants(data)
+
+
+def render_variants(data: bytes) -> list:
+    """Redimensiona e codifica uma imagem: ``[(largura, ext, bytes), ...]``.
+
+    Nao acessa storage nem banco, entao pode rodar em outro processo
+    (ver core.gifts; este modulo nao importa models).
+    """
+    with Image.open(io.BytesIO(data)) as src:
+        src = ImageOps.exif_transpose(src)
+        src.load()
+
+    widths = [w for w in VARIANT_WIDTHS if w < src.width] or [src.width]
+    rendered = []
+    for width in widths:
+        height = max(1, round(src.height * width / src.width))
+        resized = src.resize((width, height), Image.LANCZOS) if width != src.width else src
+        for fmt, ext in (("WEBP", "webp"), ("JPEG", "jpg")):
+            img = resized if fmt == "WEBP" and resized.mode in ("RGB", "RGBA") else _flatten(resized)
+            rendered.append((width, ext, _encode(img, fmt)))
+    return rendered
+
+
+def save_variants(source_name: str, rendered) -> dict:
+    """Grava o resultado de render_variants e retorna a entrada de ``image_variants``."""
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    stem = re.sub(r"\.[0-9a-f]{%d}$" % HASH_LENGTH, "", stem)
+    variants = {"source": source_name, "webp": [], "jpeg": []}
+    for width, ext, content in rendered:
+        # core.storage poe o hash da miniatura no nome (URL imutavel) e reaproveita arquivos iguais
+        name = default_storage.save(f"{VARIANT_DIR}/{stem}-{width}.{ext}", ContentFile(content))
+        variants["webp" if ext == "webp" else "jpeg"].append([width, name])
+    return variants
+
+
+def build_variants(field_file) -> dict:
+    """Gera as larguras de VARIANT_WIDTHS em WebP e JPEG para um ImageField.
+
+    Retorna ``{"source": nome_original, "webp": [[largura, nome], ...], "jpeg": [...]}``.
+    Os nomes levam o hash do conteudo de cada miniatura, entao podem ser
+    cacheados para sempre.
+    """
+    field_file.open("rb")
+    try:
+        data = field_file.read()
+    finally:
+        field_file.close()
+    return save_variants(field_file.name, render_variants(data))
+
+
+def variant_names(entry: dict) -> set:
+    return {name for key in ("webp", "jpeg") for _width, name in entry.get(key, [])}
+
+
+def referenced_media(queryset) -> set:
+    """Originais e miniaturas usados pelos presentes de ``queryset``."""
+    names = set()
+    for *files, variants in queryset.values_list(*IMAGE_FIELDS, "image_variants").iterator():
+        names.update(name for name in files if name)
+        for entry in (variants or {}).values():
+            names |= variant_names(entry)
+    return names
+
+
+def delete_unreferenced(names, queryset) -> None:
+    """Apaga de ``names`` o que nenhum presente de ``queryset`` usa.
+
+    Os nomes dependem so do conteudo: uploads iguais (no mesmo presente ou em
+    outros) compartilham os arquivos, entao so sai o que ficou sem referencia.
+    """
+    names = set(names)
+    if names:
+        names -= referenced_media(queryset)
+    for name in names:
+        default_storage.delete(name)
+
+
+def refresh_gift_variants(gift, force: bool = False) -> bool:
+    """Atualiza ``gift.image_variants`` para as imagens que mudaram.
+
+    Grava com ``update()`` para nao disparar sinais nem alterar ``updated_at``.
+    Retorna True se algo mudou.
+    """
+    current = dict(gift.image_variants or {})
+    changed = False
+    replaced = set()
+    for field in IMAGE_FIELDS:
+        file_obj = getattr(gift, field)
+        entry = current.get(field)
+        if not file_obj:
+            if entry:
+                replaced |= variant_names(entry)
+                del current[field]
+                changed = True
+            continue
+        if entry and entry.get("source") == file_obj.name and not force:
+            continue
+        try:
+            new_entry = build_variants(file_obj)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Arquivo ausente ou formato que o Pillow nao le (ex.: SVG): usa o original
+            continue
+        if entry:
+            replaced |= variant_names(entry)
+        current[field] = new_entry
+        changed = True
+
+    if changed:
+        gift.image_variants = current
+        type(gift).objects.filter(pk=gift.pk).update(image_variants=current)
+        for entry in current.values():
+            replaced -= variant_names(entry)
+        delete_unreferenced(replaced, type(gift).objects.exclude(pk=gift.pk))
+    return changed
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.gifts import export_gifts
+
+
+class Command(BaseCommand):
+    help = "Exporta o catalogo (manifest.json + imagens) para um .zip que importar_presentes aceita."
+
+    def add_arguments(self, parser):
+        parser.add_argument("saida", help="Arquivo .zip de destino.")
+
+    def handle(self, *args, **options):
+        size = 0
+        with open(options["saida"], "wb") as fh:
+            for chunk in export_gifts():
+                fh.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Catalogo exportado para {options['saida']} ({size} bytes)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.images import refresh_gift_variants
+from core.models import Gift
+
+
+class Command(BaseCommand):
+    help = "Gera as miniaturas WebP/JPEG das imagens dos presentes que ainda nao as possuem."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenera as miniaturas mesmo quando ja estao atualizadas.",
+        )
+
+    def handle(self, *args, **options):
+        updated = 0
+        gifts = Gift.objects.only("id", "title", "image", "image_2", "image_3", "image_variants")
+        for gift in gifts.iterator(chunk_size=100):
+            if refresh_gift_variants(gift, force=options["force"]):
+                updated += 1
+                self.stdout.write(f"  {gift.id}: {gift.title}")
+        self.stdout.write(self.style.SUCCESS(f"{updated} presente(s) atualizado(s)."))
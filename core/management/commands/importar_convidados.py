@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.guests import GuestFileError, import_guests, read_guest_rows
+
+
+class Command(BaseCommand):
+    help = "Importa convidados de uma planilha CSV ou XLSX (colunas nome, email, telefone)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo .csv ou .xlsx.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Valida e mostra o resultado sem criar contas.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["arquivo"]
+        try:
+            with open(path, "rb") as fh:
+                rows = read_guest_rows(fh, path)
+        except OSError as exc:
+            raise CommandError(f"Nao foi possivel abrir {path}: {exc}")
+        except GuestFileError as exc:
+            raise CommandError(str(exc))
+
+        result = import_guests(rows, dry_run=options["dry_run"])
+        for line, reason in result.errors:
+            self.stderr.write(f"  linha {line}: {reason}")
+        for line, reason in result.skipped:
+            self.stdout.write(f"  linha {line}: {reason}")
+        verb = "seriam criados" if options["dry_run"] else "criados"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} convidado(s) {verb}, {len(result.skipped)} ignorado(s), "
+                f"{len(result.errors)} com erro."
+            )
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.gifts import GiftFileError, import_gifts
+
+
+class Command(BaseCommand):
+    help = "Importa presentes de um .zip (imagens + manifest.json/manifest.csv), como o gerado por exportar_presentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo .zip.")
+        parser.add_argument("--manifesto", default="", help="Manifesto JSON/CSV fora do zip.")
+        parser.add_argument("--processos", type=int, default=None, help="Processos para tratar as imagens.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Valida o manifesto e as imagens sem criar presentes.",
+        )
+
+    def handle(self, *args, **options):
+        manifest = None
+        try:
+            if options["manifesto"]:
+                manifest = open(options["manifesto"], "rb")
+            result = import_gifts(
+                options["arquivo"],
+                manifest_file=manifest,
+                manifest_name=options["manifesto"],
+                dry_run=options["dry_run"],
+                processes=options["processos"],
+            )
+        except (OSError, GiftFileError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if manifest:
+                manifest.close()
+
+        for line, reason in result.errors:
+            self.stderr.write(f"  item {line}: {reason}")
+        for line, reason in result.skipped:
+            self.stdout.write(f"  item {line}: {reason}")
+        if result.errors:
+            raise CommandError("Nenhum presente foi criado: corrija os erros acima.")
+        verb = "seriam criados" if options["dry_run"] else "criados"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} presente(s) {verb}, {result.images} imagem(ns), "
+                f"{len(result.skipped)} ignorado(s)."
+            )
+        )
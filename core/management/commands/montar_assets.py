@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import AssetError, build
+
+
+class Command(BaseCommand):
+    help = (
+        "Monta static/dist (app.css, app.js, critical.css e fontes reduzidas) a partir de assets/vendor "
+        "e de static/css/styles.css e static/js/main.js. Rode apos alterar esses arquivos ou os icones dos templates."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            result = build()
+        except AssetError as exc:
+            raise CommandError(str(exc))
+
+        for name, size in sorted(result.files.items()):
+            self.stdout.write(f"  {name}: {size / 1024:.1f} KB")
+        for family in result.missing_fonts:
+            self.stderr.write(
+                self.style.WARNING(f"  Fonte {family} nao encontrada em assets/vendor/fonts; usando a alternativa do CSS.")
+            )
+        self.stdout.write(self.style.SUCCESS(f"Assets montados ({len(result.icons)} icone(s) do Font Awesome)."))
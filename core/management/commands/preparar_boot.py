@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.boot import prepare
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda migrate e collectstatic apenas se necessario (migracoes pendentes / estaticos alterados) "
+        "e mostra o tempo de cada fase. Usado por scripts/start.sh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Roda migrate e collectstatic sempre.")
+
+    def handle(self, *args, **options):
+        phases = prepare(force=options["force"], verbosity=max(options["verbosity"] - 1, 0))
+        for name, seconds, action in phases:
+            self.stdout.write(f"  {name}: {seconds:.2f}s ({action})")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from core.models import RegistryStats
+from core.stats import bump_stats_version_on_commit, get_registry_stats
+
+
+class Command(BaseCommand):
+    help = "Compara os contadores do RegistryStats com as tabelas e corrige divergencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="So verifica; termina com erro se houver divergencia (para cron/monitoramento).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            get_registry_stats()
+            # Trava a linha: ajustes concorrentes esperam a recontagem terminar
+            stats = RegistryStats.objects.select_for_update().get(pk=1)
+            actual = RegistryStats.actual_counts()
+            drift = {
+                name: (getattr(stats, name), value)
+                for name, value in actual.items()
+                if getattr(stats, name) != value
+            }
+            if not drift:
+                self.stdout.write(self.style.SUCCESS("Contadores em dia."))
+                return
+            for name, (stored, value) in drift.items():
+                self.stdout.write(f"  {name}: {stored} -> {value} ({value - stored:+d})")
+            if options["check"]:
+                raise CommandError(f"{len(drift)} contador(es) divergente(s).")
+            # Versao nova: ETag do catalogo e contagens em cache param de servir os valores errados
+            RegistryStats.objects.filter(pk=1).update(**actual, version=F("version") + 1)
+            bump_stats_version_on_commit()
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} contador(es) corrigido(s)."))
@@ -0,0 +1,319 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.auth import forget_users
+from core.models import Gift, Profile, Reservation
+from core.services import user_lookup_keys
+
+User = get_user_model()
+
+BENCH_PREFIX = "bench-"
+BENCH_GIFT_PREFIX = "[bench] "
+BENCH_PASSWORD = "bench-senha-123"
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+class Recorder:
+    """Acumula latencia, status e numero de queries por etapa (thread-safe).
+
+    Erro = status diferente do esperado pela etapa (ver ``Command._request``),
+    nao so 5xx: um login recusado que redireciona tudo para /login/ conta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, step: str, seconds: float, status: int, queries: int, ok: bool):
+        with self._lock:
+            self.samples.setdefault(step, []).append((seconds, status, queries, ok))
+
+    def summary(self, wall_seconds: float) -> dict:
+        steps = {}
+        total = 0
+        errors = 0
+        for step, samples in sorted(self.samples.items()):
+            latencies = [s[0] * 1000 for s in samples]
+            step_errors = sum(1 for s in samples if not s[3])
+            total += len(samples)
+            errors += step_errors
+            steps[step] = {
+                "requests": len(samples),
+                "errors": step_errors,
+                "statuses": {
+                    str(code): sum(1 for s in samples if s[1] == code) for code in sorted({s[1] for s in samples})
+                },
+                "p50_ms": round(_percentile(latencies, 50), 2),
+                "p95_ms": round(_percentile(latencies, 95), 2),
+                "p99_ms": round(_percentile(latencies, 99), 2),
+                "mean_ms": round(statistics.fmean(latencies), 2),
+                "queries_per_request": round(statistics.fmean(s[2] for s in samples), 2),
+            }
+        return {
+            "requests": total,
+            "errors": errors,
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else 0.0,
+            "steps": steps,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga dos fluxos dos convidados (login, catalogo, detalhe, reserva, "
+        "meus presentes) e do painel de mensagens, com N usuarios simultaneos. "
+        "Roda no processo, contra o banco configurado: use um SQLite/Postgres local."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuarios", type=int, default=20, help="Convidados simultaneos.")
+        parser.add_argument("--admins", type=int, default=2, help="Admins consultando painel_mensagens.")
+        parser.add_argument("--iteracoes", type=int, default=3, help="Vezes que cada convidado repete o fluxo.")
+        parser.add_argument("--presentes", type=int, default=200, help="Presentes criados por --popular.")
+        parser.add_argument("--popular", action="store_true", help="Cria usuarios/presentes de teste antes de rodar.")
+        parser.add_argument("--limpar", action="store_true", help="Remove usuarios/presentes de teste e sai.")
+        parser.add_argument("--saida", default="", help="Arquivo JSON de resultado.")
+        parser.add_argument("--comparar", default="", help="JSON de uma execucao anterior para comparar p95.")
+        parser.add_argument("--seed", type=int, default=1, help="Semente do gerador aleatorio.")
+
+    def handle(self, *args, **options):
+        if options["limpar"]:
+            self._cleanup()
+            return
+        if options["popular"]:
+            self._seed(options["usuarios"], options["admins"], options["presentes"])
+
+        bench_users = User.objects.filter(username__startswith=BENCH_PREFIX).order_by("id")
+        guests = list(bench_users.filter(profile__is_event_admin=False)[: options["usuarios"]])
+        admins = list(bench_users.filter(profile__is_event_admin=True)[: options["admins"]])
+        gift_ids = list(Gift.objects.filter(is_active=True).values_list("id", flat=True))
+        if len(guests) < options["usuarios"] or not gift_ids:
+            raise CommandError("Dados de teste insuficientes. Rode novamente com --popular.")
+
+        # Libera os presentes para que a disputa de reservas recomece igual a cada execucao
+        Reservation.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+
+        rng = random.Random(options["seed"])
+        recorder = Recorder()
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ("*", "")), "localhost").lstrip(".")
+        stop = threading.Event()
+
+        threads = [
+            threading.Thread(
+                target=self._guest_flow,
+                args=(user, gift_ids, options["iteracoes"], random.Random(rng.random()), recorder, host),
+            )
+            for user in guests
+        ]
+        pollers = [threading.Thread(target=self._admin_flow, args=(user, recorder, host, stop)) for user in admins]
+
+        started = time.perf_counter()
+        for thread in threads + pollers:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        for thread in pollers:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        result = {
+            "commit": _git_commit(),
+            "executado_em": datetime.now().isoformat(timespec="seconds"),
+            "banco": connections["default"].vendor,
+            "config": {
+                "usuarios": options["usuarios"],
+                "admins": options["admins"],
+                "iteracoes": options["iteracoes"],
+                "presentes": len(gift_ids),
+            },
+            **recorder.summary(wall),
+        }
+        self._report(result)
+
+        output = options["saida"] or str(
+            Path(settings.BASE_DIR) / "benchmarks" / f"{datetime.now():%Y%m%d-%H%M%S}-{result['commit']}.json"
+        )
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {output}"))
+
+        if options["comparar"]:
+            self._compare(result, json.loads(Path(options["comparar"]).read_text()))
+
+    # ------------------------------------------------------------------
+    # Fluxos
+
+    def _request(self, client, recorder, step, method, url, expected=(200, 304), redirect_to=None, **kwargs):
+        """Faz a requisicao e registra; devolve True se o status (e o destino do redirect) era o esperado."""
+        connection = connections["default"]
+        started = time.perf_counter()
+        status = 0
+        ok = False
+        with CaptureQueriesContext(connection) as ctx:
+            try:
+                response = getattr(client, method)(url, **kwargs)
+                status = response.status_code
+                if getattr(response, "streaming", False):
+                    b"".join(response.streaming_content)
+                ok = status in expected and (redirect_to is None or response.get("Location") == redirect_to)
+            except Exception as exc:  # noqa: BLE001 - erro entra na estatistica
+                self.stderr.write(f"{step}: {exc!r}")
+        recorder.add(step, time.perf_counter() - started, status, len(ctx), ok)
+        return ok
+
+    def _login(self, client, recorder, user) -> bool:
+        self._request(client, recorder, "login_view GET", "get", reverse("login"))
+        ok = self._request(
+            client,
+            recorder,
+            "login_view POST",
+            "post",
+            reverse("login"),
+            expected=(302,),
+            redirect_to=reverse("catalogo"),
+            data={"identifier": user.email, "password": BENCH_PASSWORD},
+        )
+        if not ok:
+            self.stderr.write(f"Login falhou para {user.email}; fluxo interrompido.")
+        return ok
+
+    def _guest_flow(self, user, gift_ids, iterations, rng, recorder, host):
+        try:
+            client = Client(HTTP_HOST=host)
+            if not self._login(client, recorder, user):
+                return
+            for _ in range(iterations):
+                gift_id = rng.choice(gift_ids)
+                self._request(client, recorder, "catalogo", "get", reverse("catalogo"))
+                self._request(client, recorder, "presente_detalhe", "get", reverse("presente_detalhe", args=[gift_id]))
+                self._request(
+                    client,
+                    recorder,
+                    "reservar_presente",
+                    "post",
+                    reverse("reservar_presente", args=[gift_id]),
+                    expected=(201, 409),
+                    data={"anonymous_message": "Mensagem de teste de carga"},
+                    HTTP_ACCEPT="application/json",
+                )
+                self._request(client, recorder, "meus_presentes", "get", reverse("meus_presentes"))
+        finally:
+            connections.close_all()
+
+    def _admin_flow(self, user, recorder, host, stop):
+        try:
+            client = Client(HTTP_HOST=host)
+            if not self._login(client, recorder, user):
+                return
+            while not stop.is_set():
+                self._request(client, recorder, "painel_mensagens", "get", reverse("painel_mensagens"))
+                stop.wait(0.5)
+        finally:
+            connections.close_all()
+
+    # ------------------------------------------------------------------
+    # Dados de teste
+
+    def _seed(self, guests: int, admins: int, gifts: int):
+        password = make_password(BENCH_PASSWORD)
+        existing = set(User.objects.filter(username__startswith=BENCH_PREFIX).values_list("username", flat=True))
+        new_users = []
+        for i in range(guests + admins):
+            username = f"{BENCH_PREFIX}{i}@exemplo.com"
+            if username not in existing:
+                new_users.append(User(username=username, email=username, first_name=f"Convidado {i}", password=password))
+        User.objects.bulk_create(new_users)
+
+        users = list(User.objects.filter(username__startswith=BENCH_PREFIX).order_by("id"))
+        admin_ids = {u.id for u in users[guests : guests + admins]}
+        # bulk_create nao dispara ensure_profile: chaves de busca do login como no cadastro
+        profiles = {p.user_id: p for p in Profile.objects.filter(user__in=users)}
+        to_create = []
+        for user in users:
+            profile = profiles.get(user.id) or Profile(user=user)
+            for field, value in user_lookup_keys(user).items():
+                setattr(profile, field, value)
+            profile.is_event_admin = user.id in admin_ids
+            if profile.pk is None:
+                to_create.append(profile)
+        Profile.objects.bulk_create(to_create)
+        Profile.objects.bulk_update(profiles.values(), ["email_key", "username_key", "name_key", "is_event_admin"])
+        forget_users([u.id for u in users])
+
+        have_gifts = Gift.objects.filter(title__startswith=BENCH_GIFT_PREFIX).count()
+        for i in range(have_gifts, gifts):
+            Gift.objects.create(
+                title=f"{BENCH_GIFT_PREFIX}Presente {i:04d}",
+                description="Panela de pressao, jogo de copos ou outro item de teste.",
+                purchase_links="Loja | https://exemplo.com/item\nhttps://exemplo.com/outro",
+            )
+        self.stdout.write(f"Dados de teste: {len(users)} usuarios, {max(gifts, have_gifts)} presentes.")
+
+    def _cleanup(self):
+        Reservation.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+        Gift.objects.filter(title__startswith=BENCH_GIFT_PREFIX).delete()
+        deleted, _ = User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS(f"Dados de teste removidos ({deleted} registros)."))
+
+    # ------------------------------------------------------------------
+    # Relatorio
+
+    def _report(self, result: dict):
+        self.stdout.write(
+            f"{result['requests']} requisicoes em {result['wall_seconds']}s "
+            f"({result['throughput_rps']} req/s), {result['errors']} erros [{result['banco']}, {result['commit']}]"
+        )
+        self.stdout.write(f"{'etapa':<22}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for step, data in result["steps"].items():
+            self.stdout.write(
+                f"{step:<22}{data['requests']:>6}{data['p50_ms']:>9}{data['p95_ms']:>9}"
+                f"{data['p99_ms']:>9}{data['queries_per_request']:>9}"
+            )
+
+    def _compare(self, current: dict, previous: dict):
+        self.stdout.write(f"Comparacao com {previous.get('commit')} (p95 ms / queries):")
+        for step, data in current["steps"].items():
+            old = previous.get("steps", {}).get(step)
+            if not old:
+                continue
+            self.stdout.write(
+                f"  {step:<22}{old['p95_ms']:>9} -> {data['p95_ms']:<9}"
+                f"{old['queries_per_request']:>6} -> {data['queries_per_request']}"
+            )
@@ -0,0 +1,126 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .storage import is_hashed_name
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, max-age=3600, must-revalidate"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _RangeFile:
+    """Arquivo limitado a ``length`` bytes a partir da posicao atual.
+
+    Mantem ``fileno()``: o gunicorn usa sendfile() com o offset do descritor e o
+    Content-Length da resposta, sem copiar os bytes para o Python.
+    """
+
+    def __init__(self, fh, length: int):
+        self._fh = fh
+        self._remaining = length
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._fh.close()
+
+
+def _parse_range(header: str, size: int):
+    """Retorna (inicio, fim) inclusivos para um unico intervalo, ou None."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def serve_media(request, path: str):
+    """Serve arquivos de MEDIA_ROOT em producao.
+
+    - ETag/Last-Modified com 304 em GET condicional;
+    - Range (um intervalo) com 206;
+    - ``immutable`` para nomes com hash de conteudo (core.storage);
+    - FileResponse com ``fileno()``: o servidor WSGI usa sendfile().
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404()
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404()
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404()
+
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    last_modified = int(st.st_mtime)
+    cache_control = IMMUTABLE_CACHE if is_hashed_name(path) else REVALIDATE_CACHE
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        if isinstance(conditional, HttpResponseNotModified):
+            conditional["Cache-Control"] = cache_control
+        return conditional
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+    size = st.st_size
+
+    byte_range = None
+    range_header = request.headers.get("Range", "")
+    if range_header and (not request.headers.get("If-Range") or request.headers["If-Range"] == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None and RANGE_RE.match(range_header.strip()):
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    fh = open(fullpath, "rb")
+    if byte_range:
+        start, end = byte_range
+        fh.seek(start)
+        response = FileResponse(_RangeFile(fh, end - start + 1), content_type=content_type, status=206)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(fh, content_type=content_type)
+        response["Content-Length"] = str(size)
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = cache_control
+    return response
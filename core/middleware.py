@@ -0,0 +1,168 @@
+import secrets
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_string
+
+from . import perf
+from .auth import get_cached_user, maybe_purge_sessions
+from .health import LIVE_PATH, READY_PATH, database_probe
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - sem brotli, so gzip
+    brotli = None
+
+
+class HealthCheckMiddleware:
+    """Responde /healthz e /readyz antes de qualquer outro middleware (ver core.health)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info
+        if path == LIVE_PATH:
+            return self._respond(True)
+        if path == READY_PATH:
+            return self._respond(database_probe.is_ready())
+        return self.get_response(request)
+
+    def _respond(self, ok: bool):
+        response = HttpResponse(b"ok" if ok else b"unavailable", content_type="text/plain", status=200 if ok else 503)
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class PerformanceMiddleware:
+    """Mede SQL, templates e view de cada requisicao.
+
+    Emite ``Server-Timing`` e alimenta o resumo de /painel/desempenho/.
+    Com PERF_INSTRUMENTATION desligado, sai da cadeia de middlewares na
+    inicializacao (custo zero por requisicao).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        perf.patch_template_render()
+
+    def __call__(self, request):
+        timings = perf.RequestTimings()
+        token = perf.current.set(timings)
+        request._perf_view_started = None
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(perf.query_timer):
+                response = self.get_response(request)
+        finally:
+            perf.current.reset(token)
+        finished = time.perf_counter()
+
+        total = finished - started
+        view_started = request._perf_view_started
+        view = finished - view_started if view_started else 0.0
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.queries} queries"',
+                f"tpl;dur={timings.template_seconds * 1000:.1f}",
+                f"view;dur={view * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            perf.view_stats.record(match.view_name or match._func_path, total, view, timings)
+            perf.view_stats.maybe_publish()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf_view_started = time.perf_counter()
+        return None
+
+
+COMPRESSIBLE_TYPES = ("text/html", "application/json")
+BROTLI_QUALITY = 5  # dinamico: 5 comprime quase como 11 em uma fracao do tempo
+MAX_RANDOM_BYTES = 100
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(name.strip())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Comprime HTML e JSON gerados pelas views: Brotli se aceito, senao gzip.
+
+    Ficam de fora respostas em streaming (SSE, exportacoes, arquivos), menores
+    que COMPRESSION_MIN_BYTES ou ja codificadas. Contra BREACH:
+
+    - os tokens CSRF ja saem mascarados a cada resposta pelo Django;
+    - requisicoes disparadas por outro site (``Sec-Fetch-Site: cross-site``),
+      que e como o ataque mede as respostas, nao sao comprimidas;
+    - o tamanho comprimido recebe ruido aleatorio (ate MAX_RANDOM_BYTES): no
+      gzip pelo nome de arquivo do cabecalho (como o GZipMiddleware), no
+      Brotli por um comentario HTML ao final. JSON so usa gzip por isso.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if response.status_code != 200 or len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES or "no-transform" in response.get("Cache-Control", ""):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if request.headers.get("Sec-Fetch-Site") == "cross-site":
+            return response
+
+        accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in accepted and content_type == "text/html":
+            padding = secrets.token_urlsafe(secrets.randbelow(MAX_RANDOM_BYTES) + 1)
+            compressed = brotli.compress(response.content + f"<!--{padding}-->".encode(), quality=BROTLI_QUALITY)
+            encoding = "br"
+        elif "gzip" in accepted:
+            compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+            encoding = "gzip"
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # Corpo diferente do original: o ETag passa a ser fraco
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``request.user`` vindo do cache de sessoes (ver core.auth).
+
+    Tambem dispara, de tempos em tempos, a limpeza das sessoes expiradas.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+        maybe_purge_sessions()
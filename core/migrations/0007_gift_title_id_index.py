@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0006_profile_admin_and_remove_couple_fields"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="gift",
+            index=models.Index(fields=["title", "id"], name="core_gift_title_id_idx"),
+        ),
+    ]
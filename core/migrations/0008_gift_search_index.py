@@ -0,0 +1,44 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_gift_fts "
+    "USING fts5(title, description, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO core_gift_fts (rowid, title, description) SELECT id, title, description FROM core_gift",
+]
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS core_gift_fts"]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() nao e IMMUTABLE; o wrapper permite usa-lo em um indice
+    "CREATE OR REPLACE FUNCTION core_immutable_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+    "CREATE INDEX IF NOT EXISTS core_gift_search_idx ON core_gift USING GIN ("
+    "to_tsvector('portuguese', core_immutable_unaccent("
+    "coalesce(title, '') || ' ' || coalesce(description, ''))))",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS core_gift_search_idx",
+    "DROP FUNCTION IF EXISTS core_immutable_unaccent(text)",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0007_gift_title_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
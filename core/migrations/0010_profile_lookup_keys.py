@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_lookup_keys(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Profile = apps.get_model("core", "Profile")
+    profiles = {p.user_id: p for p in Profile.objects.all()}
+    to_create = []
+    to_update = []
+    for user in User.objects.all().iterator():
+        keys = {
+            "email_key": (user.email or "").strip().casefold(),
+            "username_key": (user.username or "").strip().casefold(),
+            "name_key": (user.first_name or "").strip().casefold(),
+        }
+        profile = profiles.get(user.id)
+        if profile is None:
+            to_create.append(Profile(user_id=user.id, **keys))
+            continue
+        for field, value in keys.items():
+            setattr(profile, field, value)
+        to_update.append(profile)
+    Profile.objects.bulk_create(to_create, batch_size=500)
+    Profile.objects.bulk_update(to_update, ["email_key", "username_key", "name_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_gift_image_variants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="email_key",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="username_key",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="name_key",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+    ]
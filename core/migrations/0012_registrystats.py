@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    Gift = apps.get_model("core", "Gift")
+    Reservation = apps.get_model("core", "Reservation")
+    RegistryStats = apps.get_model("core", "RegistryStats")
+    RegistryStats.objects.update_or_create(
+        pk=1,
+        defaults={
+            "total_active": Gift.objects.filter(is_active=True).count(),
+            "reserved": Reservation.objects.count(),
+            "unseen_messages": Reservation.objects.filter(message_seen=False, message_hidden_for_admin=False)
+            .exclude(anonymous_message="")
+            .count(),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_observer_page_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegistryStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("total_active", models.IntegerField(default=0)),
+                ("reserved", models.IntegerField(default=0)),
+                ("unseen_messages", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0012_registrystats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="registrystats",
+            name="version",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,10 @@
+import copy
+import time
+
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Q
 
 
 class Profile(models.Model):
@@ -8,8 +13,20 @@ class Profile(models.Model):
     is_event_admin = models.BooleanField(default=False)
     is_observer = models.BooleanField(default=False)
 
+    # Copias normalizadas (casefold) de email/username/nome para o login achar o
+    # usuario em uma unica consulta indexada. Mantidas pelo sinal de User.
+    email_key = models.CharField(max_length=254, blank=True, db_index=True, editable=False)
+    username_key = models.CharField(max_length=150, blank=True, db_index=True, editable=False)
+    name_key = models.CharField(max_length=150, blank=True, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Paginacao por chave (keyset) da lista de usuarios do observador
+            models.Index(fields=["name_key", "user"], name="core_profile_name_user_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.phone_number}"
 
@@ -20,7 +37,13 @@ class Profile(models.Model):
 
 
 class SiteSettings(models.Model):
-    # Singleton
+    # Singleton. Cada worker guarda uma copia em memoria (ver get_solo).
+    VERSION_KEY = "core:site_settings:version"
+    REVALIDATE_SECONDS = 5
+    _solo = None
+    _solo_version = None
+    _solo_checked_at = 0.0
+
     site_title = models.CharField(max_length=80, default="Chá de Panela")
     event_date = models.DateField(null=True, blank=True)
 
@@ -34,8 +57,39 @@ class SiteSettings(models.Model):
 
     @classmethod
     def get_solo(cls) -> "SiteSettings":
-        obj, _created = cls.objects.get_or_create(pk=1)
-        return obj
+        """Retorna o singleton a partir da copia local do worker.
+
+        A copia e revalidada contra a versao no cache compartilhado no maximo a
+        cada REVALIDATE_SECONDS, entao uma alteracao chega a todos os workers
+        dentro desse intervalo. Devolve sempre uma copia: formularios invalidos
+        alteram a instancia e nao podem sujar a copia compartilhada.
+        """
+        now = time.monotonic()
+        if cls._solo is None or now - cls._solo_checked_at >= cls.REVALIDATE_SECONDS:
+            version = cache.get(cls.VERSION_KEY)
+            if cls._solo is None or version is None or version != cls._solo_version:
+                obj, _created = cls.objects.get_or_create(pk=1)
+                if version is None:
+                    version = obj.updated_at.isoformat()
+                    cache.add(cls.VERSION_KEY, version, timeout=None)
+                cls._solo = obj
+                cls._solo_version = version
+            cls._solo_checked_at = now
+        return copy.deepcopy(cls._solo)
+
+    @classmethod
+    def invalidate_solo(cls) -> None:
+        cls._solo = None
+        cache.delete(cls.VERSION_KEY)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(type(self).invalidate_solo)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(type(self).invalidate_solo)
+        return result
 
     def __str__(self) -> str:
         return "Configurações do Site"
@@ -49,10 +103,18 @@ class Gift(models.Model):
     image_3 = models.ImageField(upload_to="gifts/", blank=True, null=True)
     purchase_links = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Miniaturas WebP/JPEG geradas no upload (ver core.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Paginacao por chave (keyset) do catalogo
+            models.Index(fields=["title", "id"], name="core_gift_title_id_idx"),
+        ]
+
     @property
     def is_reserved(self) -> bool:
         return hasattr(self, "reservation")
@@ -77,18 +139,34 @@ class Gift(models.Model):
             items.append({"label": label, "url": url})
         return items
 
+    def _image_entry(self, field: str):
+        file_obj = getattr(self, field)
+        if not file_obj:
+            return None
+        entry = {
+            "url": file_obj.url,
+            "alt": f"Imagem do presente {self.title}",
+            "srcset": "",
+            "srcset_webp": "",
+        }
+        variants = (self.image_variants or {}).get(field)
+        if variants and variants.get("source") == file_obj.name:
+            storage = file_obj.storage
+            entry["srcset"] = ", ".join(f"{storage.url(name)} {w}w" for w, name in variants["jpeg"])
+            entry["srcset_webp"] = ", ".join(f"{storage.url(name)} {w}w" for w, name in variants["webp"])
+        return entry
+
+    @property
+    def card_image(self):
+        return self._image_entry("image")
+
     @property
     def images_list(self):
         images = []
         for field in ("image", "image_2", "image_3"):
-            file_obj = getattr(self, field)
-            if file_obj:
-                images.append(
-                    {
-                        "url": file_obj.url,
-                        "alt": f"Imagem do presente {self.title}",
-                    }
-                )
+            entry = self._image_entry(field)
+            if entry:
+                images.append(entry)
         return images
 
     def __str__(self) -> str:
@@ -107,6 +185,12 @@ class Reservation(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Paginacao por chave das mensagens do observador (mais recentes primeiro)
+            models.Index(fields=["created_at", "id"], name="core_reservation_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Reserva: {self.gift_id}"
 
@@ -114,3 +198,33 @@ class Reservation(models.Model):
     def reserver_name(self) -> str:
         base = self.user.get_full_name() or self.user.username or "Convidado"
         return base
+
+
+# Reserva com mensagem que ainda aparece no sino dos admins
+UNSEEN_MESSAGE = Q(message_seen=False, message_hidden_for_admin=False) & ~Q(anonymous_message="")
+
+
+class RegistryStats(models.Model):
+    # Singleton (pk=1) com os contadores do catalogo. E atualizado com deltas
+    # F() na mesma transacao que cria/remove reservas, ativa/desativa presentes
+    # ou marca mensagens (ver core.stats); ler e uma busca por chave primaria.
+    # Divergencias sao corrigidas por ``manage.py reconciliar_contadores``.
+    total_active = models.IntegerField(default=0)
+    reserved = models.IntegerField(default=0)
+    unseen_messages = models.IntegerField(default=0)
+    # Avanca a cada alteracao de presente, reserva ou mensagem (ETag das paginas)
+    version = models.BigIntegerField(default=0)
+
+    COUNTER_FIELDS = ("total_active", "reserved", "unseen_messages")
+
+    @classmethod
+    def actual_counts(cls) -> dict:
+        """Contagens recalculadas a partir das tabelas."""
+        return {
+            "total_active": Gift.objects.filter(is_active=True).count(),
+            "reserved": Reservation.objects.count(),
+            "unseen_messages": Reservation.objects.filter(UNSEEN_MESSAGE).count(),
+        }
+
+    def __str__(self) -> str:
+        return "Contadores do catálogo"
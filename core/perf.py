@@ -0,0 +1,183 @@
+"""Medicoes por requisicao (SQL, templates, view) e resumo por view.
+
+Ativado com PERF_INSTRUMENTATION=1 (ver core.middleware.PerformanceMiddleware).
+Cada worker acumula as amostras em memoria e publica o resumo no cache
+compartilhado a cada PUBLISH_SECONDS; /painel/desempenho/ junta os workers.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+
+from django.core.cache import cache
+
+SAMPLES_PER_VIEW = 200
+SLOW_QUERIES_PER_VIEW = 5
+PUBLISH_SECONDS = 10
+WORKERS_KEY = "core:perf:workers"
+WORKER_KEY = "core:perf:worker:{pid}"
+WORKER_TIMEOUT = 10 * 60
+
+current = contextvars.ContextVar("core_perf_current", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db_seconds", "slow_queries", "template_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow_queries = []
+        self.template_seconds = 0.0
+
+    def add_query(self, sql: str, seconds: float):
+        self.queries += 1
+        self.db_seconds += seconds
+        self.slow_queries.append((seconds, sql))
+        if len(self.slow_queries) > SLOW_QUERIES_PER_VIEW:
+            self.slow_queries.sort(reverse=True)
+            del self.slow_queries[SLOW_QUERIES_PER_VIEW:]
+
+
+def query_timer(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` que soma tempo e guarda as queries lentas."""
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
+
+
+_template_patched = False
+
+
+def patch_template_render():
+    """Mede Template.render do backend Django (uma vez por render() de view).
+
+    Includes e heranca acontecem dentro dessa chamada, entao o tempo medido e o
+    da pagina inteira, incluindo queries disparadas pelo template.
+    """
+    global _template_patched
+    if _template_patched:
+        return
+    from django.template.backends.django import Template
+
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None:
+            return original(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timings.template_seconds += time.perf_counter() - started
+
+    Template.render = render
+    _template_patched = True
+
+
+class ViewStats:
+    """Amostras recentes por view, deste worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._published_at = 0.0
+
+    def record(self, view_name, total, view, timings):
+        with self._lock:
+            entry = self._views.get(view_name)
+            if entry is None:
+                entry = self._views[view_name] = {
+                    "count": 0,
+                    "samples": deque(maxlen=SAMPLES_PER_VIEW),
+                    "slow_queries": [],
+                }
+            entry["count"] += 1
+            entry["samples"].append(
+                (total, view, timings.db_seconds, timings.queries, timings.template_seconds)
+            )
+            slow = entry["slow_queries"] + [(round(s * 1000, 2), sql[:500]) for s, sql in timings.slow_queries]
+            slow.sort(reverse=True)
+            entry["slow_queries"] = slow[:SLOW_QUERIES_PER_VIEW]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": entry["count"],
+                    "samples": list(entry["samples"]),
+                    "slow_queries": list(entry["slow_queries"]),
+                }
+                for name, entry in self._views.items()
+            }
+
+    def maybe_publish(self):
+        now = time.monotonic()
+        if now - self._published_at < PUBLISH_SECONDS:
+            return
+        self._published_at = now
+        pid = os.getpid()
+        cache.set(WORKER_KEY.format(pid=pid), self.snapshot(), timeout=WORKER_TIMEOUT)
+        workers = set(cache.get(WORKERS_KEY) or ())
+        if pid not in workers:
+            workers.add(pid)
+            cache.set(WORKERS_KEY, workers, timeout=None)
+
+
+view_stats = ViewStats()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summary():
+    """Resumo por view juntando todos os workers que publicaram no cache."""
+    view_stats.maybe_publish()
+    merged = {}
+    workers = set(cache.get(WORKERS_KEY) or ())
+    alive = set()
+    for pid in workers:
+        data = cache.get(WORKER_KEY.format(pid=pid))
+        if data is None:
+            continue
+        alive.add(pid)
+        for name, entry in data.items():
+            target = merged.setdefault(name, {"count": 0, "samples": [], "slow_queries": []})
+            target["count"] += entry["count"]
+            target["samples"].extend(entry["samples"])
+            target["slow_queries"].extend(entry["slow_queries"])
+    if alive != workers:
+        cache.set(WORKERS_KEY, alive, timeout=None)
+
+    rows = []
+    for name, entry in merged.items():
+        samples = entry["samples"]
+        if not samples:
+            continue
+        totals = [s[0] * 1000 for s in samples]
+        rows.append(
+            {
+                "view": name,
+                "count": entry["count"],
+                "p50_ms": round(_percentile(totals, 50), 1),
+                "p95_ms": round(_percentile(totals, 95), 1),
+                "view_ms": round(sum(s[1] for s in samples) * 1000 / len(samples), 1),
+                "db_ms": round(sum(s[2] for s in samples) * 1000 / len(samples), 1),
+                "queries": round(sum(s[3] for s in samples) / len(samples), 1),
+                "template_ms": round(sum(s[4] for s in samples) * 1000 / len(samples), 1),
+                "slow_queries": sorted(entry["slow_queries"], reverse=True)[:SLOW_QUERIES_PER_VIEW],
+            }
+        )
+    rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+    return {"views": rows, "workers": len(alive)}
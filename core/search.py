@@ -0,0 +1,87 @@
+"""Busca textual no catalogo (titulo e descricao dos presentes).
+
+- SQLite: tabela FTS5 ``core_gift_fts`` (tokenizer sem acentos), mantida pelos
+  sinais de Gift.
+- Postgres: indice GIN sobre ``to_tsvector('portuguese', unaccent(...))``,
+  mantido pelo proprio banco.
+- Outros bancos: ``icontains`` termo a termo.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "core_gift_fts"
+MAX_TERMS = 8
+
+# Precisa ser identica a expressao do indice (migracao 0008) para o Postgres usa-lo.
+PG_DOCUMENT = (
+    "to_tsvector('portuguese', core_immutable_unaccent("
+    "coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+
+
+def _terms(query: str):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def filter_gifts(qs, query: str):
+    """Restringe ``qs`` aos presentes cujo titulo/descricao casam com ``query``.
+
+    Cada termo casa por prefixo ("panel" encontra "panela") e todos os termos
+    precisam aparecer.
+    """
+    terms = _terms(query)
+    if not terms:
+        return qs
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return qs.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        )
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return qs.filter(
+            id__in=RawSQL(
+                f"SELECT id FROM core_gift WHERE {PG_DOCUMENT} "
+                "@@ to_tsquery('portuguese', core_immutable_unaccent(%s))",
+                (tsquery,),
+            )
+        )
+
+    for term in terms:
+        qs = qs.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    return qs
+
+
+def index_gift(gift) -> None:
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [gift.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+            [gift.pk, gift.title, gift.description],
+        )
+
+
+def unindex_gift(gift_id: int) -> None:
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [gift_id])
+
+
+def rebuild_index() -> None:
+    """Reconstroi o indice FTS5 a partir de core_gift (ex.: apos bulk_create)."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            "SELECT id, title, description FROM core_gift"
+        )
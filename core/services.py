@@ -1,5 +1,7 @@
 import re
 
+from django.db import IntegrityError, transaction
+
 
 def normalize_phone(phone_raw: str) -> str:
     """Normaliza telefone para formato E.164 (default BR se nao houver codigo do pais)."""
@@ -11,3 +13,47 @@ def normalize_phone(phone_raw: str) -> str:
     if len(digits) in (10, 11):
         return f"+55{digits}"
     return f"+{digits}"
+
+
+def identifier_key(value: str) -> str:
+    """Forma normalizada (casefold) usada nas colunas de busca do login."""
+    return (value or "").strip().casefold()
+
+
+def user_lookup_keys(user) -> dict:
+    """Valores das colunas normalizadas de Profile para este usuario."""
+    return {
+        "email_key": identifier_key(user.email),
+        "username_key": identifier_key(user.username),
+        "name_key": identifier_key(user.first_name),
+    }
+
+
+def unique_username(base: str, taken: set) -> str:
+    """Primeiro de ``base``, ``base-2``, ``base-3``... fora de ``taken`` (casefold).
+
+    ``taken`` e atualizado, entao pode ser reutilizado para gerar varios nomes.
+    """
+    candidate = base
+    counter = 2
+    while identifier_key(candidate) in taken:
+        candidate = f"{base}-{counter}"
+        counter += 1
+    taken.add(identifier_key(candidate))
+    return candidate
+
+
+def reserve_gift(gift, user, message: str = ""):
+    """Reserva o presente com um unico INSERT otimista.
+
+    A unicidade de ``Reservation.gift`` (OneToOne) decide a disputa no banco:
+    sem lock previo nem consulta extra. Retorna a reserva criada, ou None se
+    outra pessoa reservou primeiro.
+    """
+    from .models import Reservation
+
+    try:
+        with transaction.atomic():
+            return Reservation.objects.create(gift=gift, user=user, anonymous_message=message[:1000])
+    except IntegrityError:
+        return None
@@ -1,14 +1,120 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Profile
+from .auth import forget_user
+from .events import publish_gift_event
+from .fragments import forget_gift
+from .images import refresh_gift_variants
+from .models import Gift, Profile, Reservation
+from .search import index_gift, unindex_gift
+from .services import user_lookup_keys
+from .stats import adjust_registry, bump_stats_version_on_commit, is_unseen_message, record_gift_change
 
 User = get_user_model()
 
 
+LOOKUP_SOURCE_FIELDS = {"email", "username", "first_name"}
+
+
+@receiver(post_save, sender=User)
+def ensure_profile(sender, instance, created, update_fields=None, **kwargs):
+    keys = user_lookup_keys(instance)
+    if created:
+        Profile.objects.create(user=instance, **keys)
+        return
+    # Ex.: login() salva apenas last_login; nada a atualizar
+    if update_fields is not None and not LOOKUP_SOURCE_FIELDS.intersection(update_fields):
+        return
+    Profile.objects.filter(user=instance).update(**keys)
+
+
+# Usuario + perfil em cache para a autenticacao (core.auth)
 @receiver(post_save, sender=User)
-def ensure_profile(sender, instance, created, **kwargs):
-    if not created:
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_cached_profile_user(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_user(instance.user_id))
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def invalidate_stats(sender, instance, **kwargs):
+    # Contagem por usuario (cache versionado)
+    bump_stats_version_on_commit()
+
+
+# Contadores do RegistryStats: reserve_gift, cancelar_reserva e o delete em
+# cascata rodam em transacao, entao o ajuste entra no mesmo commit.
+
+
+@receiver(post_save, sender=Reservation)
+def count_reserved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_registry(reserved=1, unseen_messages=int(is_unseen_message(instance)))
+
+
+@receiver(post_delete, sender=Reservation)
+def count_released(sender, instance, **kwargs):
+    adjust_registry(reserved=-1, unseen_messages=-int(is_unseen_message(instance)))
+
+
+@receiver(post_save, sender=Reservation)
+def publish_reserved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: publish_gift_event(instance.gift_id, reserved=True))
+
+
+@receiver(post_delete, sender=Reservation)
+def publish_released(sender, instance, **kwargs):
+    transaction.on_commit(lambda: publish_gift_event(instance.gift_id, reserved=False))
+
+
+@receiver(post_save, sender=Gift)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_gift(instance)
+
+
+@receiver(post_save, sender=Gift)
+def update_image_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_gift_variants(instance)
+
+
+@receiver(post_delete, sender=Gift)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_gift(instance.pk)
+
+
+# Depois das miniaturas: quando ``version`` avanca o presente ja esta completo
+@receiver(post_save, sender=Gift)
+@receiver(post_delete, sender=Gift)
+def count_active_gifts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_gift_change()
+
+
+@receiver(post_save, sender=Gift)
+@receiver(post_delete, sender=Gift)
+def forget_gift_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: forget_gift(instance.pk))
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def forget_reserved_gift_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
         return
-    Profile.objects.create(user=instance)
+    transaction.on_commit(lambda: forget_gift(instance.gift_id))
@@ -0,0 +1,128 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Func
+
+from .models import UNSEEN_MESSAGE, Gift, RegistryStats, Reservation
+
+STATS_VERSION_KEY = "core:stats:version"
+STATS_TIMEOUT = 60 * 60
+
+
+def get_stats_version() -> int:
+    version = cache.get(STATS_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        # add() evita que dois workers sobrescrevam a versao um do outro. No cache
+        # em disco o add() nao e atomico: se dois gravarem, vale a ultima versao e
+        # o que perdeu so deixa entradas orfas (expiram em STATS_TIMEOUT)
+        if not cache.add(STATS_VERSION_KEY, version, timeout=None):
+            version = cache.get(STATS_VERSION_KEY, version)
+    return version
+
+
+def bump_stats_version() -> None:
+    """Invalida as contagens em cache de todos os workers.
+
+    Cada invalidacao grava um valor novo (e nao um incremento), entao duas
+    invalidacoes concorrentes nunca se anulam, mesmo em backends sem incr atomico.
+    """
+    cache.set(STATS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_stats_version_on_commit() -> None:
+    # So invalida depois do commit: assim nenhum worker recalcula a partir
+    # de dados ainda nao confirmados e guarda o resultado na versao nova.
+    transaction.on_commit(bump_stats_version)
+
+
+def get_registry_stats() -> RegistryStats:
+    """Linha de contadores (uma busca por chave primaria); criada na primeira leitura."""
+    try:
+        return RegistryStats.objects.get(pk=1)
+    except RegistryStats.DoesNotExist:
+        stats, _created = RegistryStats.objects.get_or_create(pk=1, defaults=RegistryStats.actual_counts())
+        return stats
+
+
+def adjust_registry(**deltas) -> None:
+    """Soma ``deltas`` aos contadores e avanca ``version`` com um unico UPDATE.
+
+    Deve rodar dentro da transacao da alteracao: se ela for desfeita, o
+    ajuste tambem e. O UPDATE trava a linha ate o commit, entao ajustes
+    concorrentes sao serializados e nenhum se perde.
+    """
+    changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    changes["version"] = F("version") + 1
+    updated = RegistryStats.objects.filter(pk=1).update(**changes)
+    if not updated:
+        # Sem linha ainda: a contagem inicial ja enxerga a alteracao
+        get_registry_stats()
+
+
+def record_gift_change() -> None:
+    """Recalcula total_active no proprio UPDATE (subconsulta COUNT) e avanca ``version``."""
+    # Func e nao Count: sem GROUP BY, a subconsulta devolve sempre uma linha
+    active = Gift.objects.filter(is_active=True).order_by().annotate(n=Func(F("pk"), function="COUNT")).values("n")
+    updated = RegistryStats.objects.filter(pk=1).update(total_active=active, version=F("version") + 1)
+    if not updated:
+        get_registry_stats()
+
+
+def get_global_counts() -> dict:
+    stats = get_registry_stats()
+    return {"total_gifts": stats.total_active, "reserved_gifts": stats.reserved}
+
+
+def get_user_reserved_count(user) -> int:
+    key = f"core:stats:{get_stats_version()}:user:{user.pk}"
+    count = cache.get(key)
+    if count is None:
+        count = Reservation.objects.filter(user=user).count()
+        cache.set(key, count, timeout=STATS_TIMEOUT)
+    return count
+
+
+def get_unseen_message_count() -> int:
+    """Mensagens ainda nao vistas pelos admins (sino da navbar)."""
+    return get_registry_stats().unseen_messages
+
+
+def is_unseen_message(reservation) -> bool:
+    return bool(
+        reservation.anonymous_message
+        and not reservation.message_seen
+        and not reservation.message_hidden_for_admin
+    )
+
+
+def mark_messages_seen(queryset) -> None:
+    with transaction.atomic():
+        changed = queryset.filter(UNSEEN_MESSAGE).update(message_seen=True)
+        if changed:
+            adjust_registry(unseen_messages=-changed)
+
+
+def set_messages_hidden(queryset, hidden: bool) -> None:
+    with transaction.atomic():
+        # O delta vem das linhas realmente alteradas, nao de uma leitura
+        # anterior: duas requisicoes iguais simultaneas nao contam em dobro.
+        if hidden:
+            changed = -queryset.filter(UNSEEN_MESSAGE).update(message_hidden_for_admin=True)
+        else:
+            changed = (
+                queryset.filter(message_hidden_for_admin=True, message_seen=False)
+                .exclude(anonymous_message="")
+                .update(message_hidden_for_admin=False)
+            )
+        if queryset.update(message_hidden_for_admin=hidden):
+            adjust_registry(unseen_messages=changed)
+
+
+def delete_messages(queryset) -> None:
+    changes = {"anonymous_message": "", "message_hidden_for_admin": True, "message_seen": True}
+    with transaction.atomic():
+        changed = queryset.filter(UNSEEN_MESSAGE).update(**changes)
+        if queryset.update(**changes):
+            adjust_registry(unseen_messages=-changed)
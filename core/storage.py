@@ -0,0 +1,44 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+# nome.<hash>.ext: conteudo enderecado pelo hash, pode ser cacheado para sempre
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % HASH_LENGTH)
+
+
+def is_hashed_name(name: str) -> bool:
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """Salva uploads como ``nome.<hash>.ext`` (hash do conteudo).
+
+    Como o nome muda sempre que o conteudo muda, a URL pode ser servida com
+    ``Cache-Control: immutable`` (ver core.media). Uploads identicos reutilizam
+    o mesmo arquivo. O hash e sempre calculado sobre os bytes recebidos: um
+    nome que so parece ter hash (``foto.0123456789ab.jpg``) ganha o hash real.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final sai de _save (hash do conteudo): mesmo nome = mesmo conteudo
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+
+        root, ext = os.path.splitext(name)
+        if is_hashed_name(name):
+            root = os.path.splitext(root)[0]
+        hashed = f"{root}.{digest.hexdigest()[:HASH_LENGTH]}{ext}"
+        if self.exists(hashed):
+            return hashed
+        return super()._save(hashed, content)
@@ -0,0 +1,47 @@
+"""Loaders de template que removem a indentacao do HTML ao carregar o arquivo.
+
+A minificacao acontece uma vez por template (o cached.Loader guarda o
+resultado compilado), sem custo por requisicao. Tira espacos do inicio das
+linhas, linhas vazias, comentarios HTML e a quebra de linha depois de linhas
+que so tem uma tag de template. As demais quebras de linha ficam, entao o
+espaco entre elementos inline e o JavaScript que depende de ASI continuam
+iguais. Conteudo de <pre> e <textarea> e preservado.
+"""
+import re
+
+from django.template.loaders import app_directories, filesystem
+
+PRESERVE_RE = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.S | re.I)
+INDENT_RE = re.compile(r"^[ \t]+", re.M)
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->\n?", re.S)
+TAG_LINE_RE = re.compile(r"^(\{%[^\n]*?%\}|\{#[^\n]*?#\})[ \t]*\n", re.M)
+BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+
+def minify_html(source: str) -> str:
+    parts = PRESERVE_RE.split(source)
+    out = []
+    # split com 2 grupos: [texto, bloco preservado, nome da tag, texto, ...]
+    for index in range(0, len(parts), 3):
+        text = COMMENT_RE.sub("", INDENT_RE.sub("", parts[index]))
+        text = TAG_LINE_RE.sub(r"\1", text)
+        out.append(BLANK_LINES_RE.sub("\n", text))
+        if index + 1 < len(parts):
+            out.append(parts[index + 1])
+    return "".join(out)
+
+
+class MinifyMixin:
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if origin.name.endswith(".html"):
+            return minify_html(contents)
+        return contents
+
+
+class FilesystemLoader(MinifyMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyMixin, app_directories.Loader):
+    pass
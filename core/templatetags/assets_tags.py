@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def _read_static(path: str) -> str:
+    # Em producao le a copia do collectstatic; em desenvolvimento, de static/
+    if not settings.DEBUG and staticfiles_storage.exists(path):
+        with staticfiles_storage.open(path) as fh:
+            return fh.read().decode("utf-8")
+    found = finders.find(path)
+    if not found:
+        return ""
+    with open(found, encoding="utf-8") as fh:
+        return fh.read()
+
+
+_read_static_cached = lru_cache(maxsize=8)(_read_static)
+
+
+@register.simple_tag
+def inline_static(path: str):
+    """Conteudo de um arquivo estatico para ir inline (ex.: CSS critico em <style>)."""
+    content = _read_static(path) if settings.DEBUG else _read_static_cached(path)
+    return mark_safe(content)
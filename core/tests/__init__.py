@@ -0,0 +1,9 @@
+# Nos testes: caches em memoria (nada de .cache/ em disco nem Redis) e sem a
+# limpeza de sessoes em segundo plano (core.auth)
+TEST_SETTINGS = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "testes"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "testes-sessoes"},
+    },
+    "SESSION_PURGE_SECONDS": 0,
+}
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Gift, RegistryStats
+from core.stats import STATS_VERSION_KEY, get_registry_stats, get_stats_version
+from core.tests import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class ReconcileCountersTests(TestCase):
+    def test_repair_advances_versions(self):
+        Gift.objects.create(title="Panela")
+        stats = get_registry_stats()
+        RegistryStats.objects.filter(pk=1).update(total_active=stats.total_active + 3)
+        cache_version = get_stats_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconciliar_contadores", stdout=StringIO())
+
+        repaired = RegistryStats.objects.get(pk=1)
+        self.assertEqual(repaired.total_active, stats.total_active)
+        self.assertGreater(repaired.version, stats.version)
+        self.assertNotEqual(cache.get(STATS_VERSION_KEY), cache_version)
@@ -0,0 +1,27 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import guests
+from core.tests import TEST_SETTINGS
+
+User = get_user_model()
+
+
+@override_settings(**TEST_SETTINGS)
+class ImportGuestsConflictTests(TestCase):
+    def test_username_taken_during_import_is_reported(self):
+        rows = [
+            {"line": 2, "name": "Ana", "email": "ana@exemplo.com", "phone": ""},
+            {"line": 3, "name": "Rui", "email": "rui@exemplo.com", "phone": ""},
+        ]
+        # Cadastro simultaneo: o username ja existe, mas a consulta de antes nao o viu
+        User.objects.create_user("ana@exemplo.com", "outra@exemplo.com", "senha-teste-123")
+
+        with mock.patch.object(guests, "unique_username", side_effect=lambda base, taken: base):
+            result = guests.import_guests(rows)
+
+        self.assertEqual(result.created, 0)
+        self.assertIn((2, "Cadastrado por outra pessoa durante a importacao."), result.errors)
+        self.assertFalse(User.objects.filter(username="rui@exemplo.com").exists())
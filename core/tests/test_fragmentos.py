@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import fragments
+from core.models import Gift, Reservation
+from core.tests import TEST_SETTINGS
+
+User = get_user_model()
+
+
+@override_settings(**TEST_SETTINGS)
+class FragmentKeyTests(TestCase):
+    def tearDown(self):
+        fragments.templates_version.cache_clear()
+
+    def test_new_release_uses_new_keys(self):
+        with override_settings(RELEASE_ID="deploy-1"):
+            fragments.templates_version.cache_clear()
+            old = fragments._key("card", 1, "guest")
+        with override_settings(RELEASE_ID="deploy-2"):
+            fragments.templates_version.cache_clear()
+            new = fragments._key("card", 1, "guest")
+
+        self.assertNotEqual(old, new)
+
+
+@override_settings(**TEST_SETTINGS)
+class ObserverFragmentTests(TestCase):
+    def test_renamed_reserver_is_not_served_from_cache(self):
+        guest = User.objects.create_user("convidado@exemplo.com", password="senha-teste-123", first_name="Bia")
+        gift = Gift.objects.create(title="Jogo de copos")
+        Reservation.objects.create(gift=gift, user=guest)
+
+        self.assertIn("Reservado por Bia", self.body(gift.pk))
+        guest.first_name = "Beatriz"
+        guest.save()
+
+        self.assertIn("Reservado por Beatriz", self.body(gift.pk))
+
+    def body(self, gift_id):
+        gift = Gift.objects.select_related("reservation__user").get(pk=gift_id)
+        gift.reserved = True
+        fragments.attach_fragments("card", [gift], "observer")
+        return gift.fragment["body"]
@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import gifts
+from core.models import Gift
+from core.storage import HashedMediaStorage, is_hashed_name
+from core.tests import TEST_SETTINGS
+
+
+def _png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, **TEST_SETTINGS)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class HashedMediaStorageTests(MediaTestCase):
+    def test_identical_content_reuses_name(self):
+        storage = HashedMediaStorage()
+        first = storage.save("gifts/a.png", ContentFile(b"mesmo conteudo"))
+        second = storage.save("gifts/b.png", ContentFile(b"mesmo conteudo"))
+
+        self.assertTrue(is_hashed_name(first))
+        self.assertEqual(storage.open(second).read(), b"mesmo conteudo")
+
+    def test_name_that_looks_hashed_gets_real_digest(self):
+        storage = HashedMediaStorage()
+        original = storage.save("gifts/foto.png", ContentFile(b"antigo"))
+
+        # Reenvio com o mesmo nome (que ja tem cara de hash) e outro conteudo
+        replaced = storage.save(original, ContentFile(b"novo"))
+
+        self.assertNotEqual(replaced, original)
+        self.assertEqual(storage.open(original).read(), b"antigo")
+        self.assertEqual(storage.open(replaced).read(), b"novo")
+
+
+class SharedVariantsTests(MediaTestCase):
+    def _gift(self, title, data):
+        return Gift.objects.create(title=title, image=SimpleUploadedFile("panela.png", data, content_type="image/png"))
+
+    def _variant_names(self, gift):
+        gift.refresh_from_db()
+        entry = gift.image_variants["image"]
+        return [name for key in ("webp", "jpeg") for _width, name in entry[key]]
+
+    def test_clearing_one_gift_keeps_variants_shared_with_another(self):
+        data = _png("red")
+        gift_a = self._gift("A", data)
+        gift_b = self._gift("B", data)
+        shared = self._variant_names(gift_b)
+        self.assertEqual(sorted(self._variant_names(gift_a)), sorted(shared))
+
+        gift_a.image = None
+        gift_a.save()
+
+        storage = HashedMediaStorage()
+        self.assertTrue(all(storage.exists(name) for name in shared))
+        self.assertTrue(storage.exists(gift_b.image.name))
+
+    def test_replacing_unshared_image_deletes_old_variants(self):
+        gift = self._gift("A", _png("red"))
+        old = self._variant_names(gift)
+
+        gift.image = SimpleUploadedFile("outra.png", _png("blue"), content_type="image/png")
+        gift.save()
+
+        storage = HashedMediaStorage()
+        self.assertFalse(any(storage.exists(name) for name in old))
+        self.assertTrue(all(storage.exists(name) for name in self._variant_names(gift)))
+
+
+class ImportGiftsTests(MediaTestCase):
+    def _zip(self):
+        path = os.path.join(self.media_root, "presentes.zip")
+        manifest = [
+            {"title": "Panela", "image": "panela.png"},
+            {"title": "Frigideira", "image": "frigideira.png"},
+        ]
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("manifest.json", json.dumps(manifest))
+            archive.writestr("panela.png", _png("red"))
+            archive.writestr("frigideira.png", _png("blue"))
+        return path
+
+    def _stored_files(self):
+        return [
+            os.path.join(root, name)
+            for root, _dirs, names in os.walk(self.media_root)
+            for name in names
+            if name != "presentes.zip"
+        ]
+
+    def test_spawn_pool_renders_variants(self):
+        result = gifts.import_gifts(self._zip(), processes=2)
+
+        self.assertEqual((result.created, result.errors), (2, []))
+        for gift in Gift.objects.all():
+            self.assertTrue(gift.image_variants["image"]["webp"])
+
+    def test_failed_transaction_removes_stored_files(self):
+        path = self._zip()
+        with mock.patch.object(gifts.search, "rebuild_index", side_effect=RuntimeError("falhou")):
+            with self.assertRaises(RuntimeError):
+                gifts.import_gifts(path, processes=1)
+
+        self.assertFalse(Gift.objects.exists())
+        self.assertEqual(self._stored_files(), [])
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.forms import LoginForm
+from core.tests import TEST_SETTINGS
+
+User = get_user_model()
+
+
+@override_settings(**TEST_SETTINGS)
+class LoginLookupTests(TestCase):
+    def login(self, identifier):
+        return Client().post(reverse("login"), {"identifier": identifier, "password": "senha-123"})
+
+    def test_exact_username_wins_over_many_homonyms(self):
+        # Homonimos criados antes (pk menor) do dono do username
+        for i in range(LoginForm.LOOKUP_LIMIT + 1):
+            User.objects.create_user(f"outra-{i}", f"outra{i}@exemplo.com", "senha-123", first_name="ana")
+        User.objects.create_user("ana", "ana@exemplo.com", "senha-123", first_name="Ana Souza")
+
+        response = self.login("ana")
+
+        self.assertRedirects(response, reverse("catalogo"), fetch_redirect_response=False)
+
+    def test_unique_name_logs_in_but_ambiguous_name_does_not(self):
+        maria = User.objects.create_user("maria", "maria@exemplo.com", "senha-123", first_name="Maria Lima")
+        self.assertEqual(LoginForm()._find_user("maria lima"), maria)
+
+        User.objects.create_user("maria2", "maria2@exemplo.com", "senha-123", first_name="Maria Lima")
+        self.assertIsNone(LoginForm()._find_user("maria lima"))
+
+    def test_email_wins_over_username(self):
+        dono = User.objects.create_user("joao@exemplo.com", "outro@exemplo.com", "senha-123")
+        joao = User.objects.create_user("joao", "joao@exemplo.com", "senha-123")
+
+        self.assertEqual(LoginForm()._find_user("joao@exemplo.com"), joao)
@@ -0,0 +1,106 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.models import Gift, Reservation
+from core.services import reserve_gift
+from core.tests import TEST_SETTINGS
+
+User = get_user_model()
+
+
+@override_settings(**TEST_SETTINGS)
+class ReserveGiftConcurrencyTests(TransactionTestCase):
+    threads = 8
+
+    def test_only_one_reservation_wins(self):
+        gift = Gift.objects.create(title="Panela de pressao")
+        users = [
+            User.objects.create_user(f"convidado{i}@exemplo.com", password="senha-teste-123") for i in range(self.threads)
+        ]
+        barrier = threading.Barrier(self.threads)
+        results = []
+        errors = []
+
+        def reserve(user):
+            try:
+                barrier.wait()
+                results.append(reserve_gift(gift, user, "oi"))
+            except Exception as exc:  # noqa: BLE001 - falha da thread vira falha do teste
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=reserve, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        winners = [r for r in results if r is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(results.count(None), self.threads - 1)
+        self.assertEqual(Reservation.objects.filter(gift=gift).count(), 1)
+        self.assertEqual(Reservation.objects.get(gift=gift).user_id, winners[0].user_id)
+
+
+@override_settings(**TEST_SETTINGS)
+class ReserveGiftViewTests(TestCase):
+    def setUp(self):
+        self.gift = Gift.objects.create(title="Jogo de copos")
+        self.user = User.objects.create_user("convidado@exemplo.com", password="senha-teste-123")
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse("reservar_presente", args=[self.gift.id])
+
+    def test_double_submit_keeps_own_reservation(self):
+        first = self.client.post(self.url, {"anonymous_message": "oi"}, HTTP_ACCEPT="application/json")
+        second = self.client.post(self.url, {"anonymous_message": "oi"}, HTTP_ACCEPT="application/json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 409)
+        self.assertTrue(second.json()["ok"])
+        self.assertNotIn("outra pessoa", second.content.decode())
+        self.assertEqual(Reservation.objects.filter(gift=self.gift).count(), 1)
+
+    def test_conflict_with_another_guest(self):
+        other = User.objects.create_user("outro@exemplo.com", password="senha-teste-123")
+        Reservation.objects.create(gift=self.gift, user=other)
+
+        response = self.client.post(self.url, {"anonymous_message": "oi"}, HTTP_ACCEPT="application/json")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.json()["ok"])
+        self.assertIn("outra pessoa", response.json()["error"])
+
+
+@override_settings(**TEST_SETTINGS)
+class GiftCardViewTests(TestCase):
+    def setUp(self):
+        self.gift = Gift.objects.create(title="Jogo de copos")
+        guest = User.objects.create_user("convidado@exemplo.com", password="senha-teste-123", first_name="Bia")
+        Reservation.objects.create(gift=self.gift, user=guest)
+        self.url = reverse("presente_card", args=[self.gift.id])
+
+    def card(self, user):
+        client = Client()
+        client.force_login(user)
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_observer_card_names_the_reserver(self):
+        observer = User.objects.create_user("observador@exemplo.com", password="senha-teste-123")
+        observer.profile.is_observer = True
+        observer.profile.save()
+
+        self.assertIn("Reservado por Bia", self.card(observer))
+
+    def test_guest_card_stays_anonymous(self):
+        other = User.objects.create_user("outro@exemplo.com", password="senha-teste-123")
+
+        self.assertNotIn("Reservado por Bia", self.card(other))
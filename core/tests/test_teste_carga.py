@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.management.commands.teste_carga import BENCH_PASSWORD, BENCH_PREFIX, Command
+from core.models import Profile
+from core.tests import TEST_SETTINGS
+
+User = get_user_model()
+
+
+@override_settings(**TEST_SETTINGS)
+class SeedTests(TestCase):
+    def seed(self, guests=2, admins=1):
+        Command(stdout=StringIO())._seed(guests, admins, 1)
+
+    def test_seeded_user_can_log_in(self):
+        self.seed()
+        user = User.objects.filter(username__startswith=BENCH_PREFIX).order_by("id").first()
+
+        response = Client().post(reverse("login"), {"identifier": user.email, "password": BENCH_PASSWORD})
+
+        self.assertRedirects(response, reverse("catalogo"), fetch_redirect_response=False)
+
+    def test_reseed_fills_lookup_keys_and_admins(self):
+        self.seed()
+        Profile.objects.filter(user__username__startswith=BENCH_PREFIX).update(email_key="")
+        self.seed()
+
+        profiles = Profile.objects.filter(user__username__startswith=BENCH_PREFIX)
+        self.assertFalse(profiles.filter(email_key="").exists())
+        self.assertEqual(profiles.filter(is_event_admin=True).count(), 1)
@@ -16,23 +16,33 @@ urlpatterns = [
 
     # Catalogo
     path("catalogo/", views.catalogo, name="catalogo"),
+    path("catalogo/pagina/", views.catalogo_pagina, name="catalogo_pagina"),
+    path("catalogo/eventos/", views.catalogo_eventos, name="catalogo_eventos"),
     path("meus-presentes/", views.meus_presentes, name="meus_presentes"),
+    path("presentes/<int:gift_id>/detalhe/", views.presente_detalhe, name="presente_detalhe"),
+    path("presentes/<int:gift_id>/card/", views.presente_card, name="presente_card"),
     path("presentes/<int:gift_id>/reservar/", views.reservar_presente, name="reservar_presente"),
     path("presentes/<int:gift_id>/cancelar/", views.cancelar_reserva, name="cancelar_reserva"),
 
     # Painel admin
     path("painel/", views.painel_dashboard, name="painel_dashboard"),
     path("painel/presentes/", views.painel_presentes, name="painel_presentes"),
+    path("painel/presentes/importar/", views.painel_presentes_importar, name="painel_presentes_importar"),
+    path("painel/presentes/exportar/", views.painel_presentes_exportar, name="painel_presentes_exportar"),
     path("painel/presentes/novo/", views.painel_presente_novo, name="painel_presente_novo"),
     path("painel/presentes/<int:gift_id>/editar/", views.painel_presente_editar, name="painel_presente_editar"),
     path("painel/presentes/<int:gift_id>/excluir/", views.painel_presente_excluir, name="painel_presente_excluir"),
     path("painel/personalizacao/", views.painel_personalizacao, name="painel_personalizacao"),
+    path("painel/convidados/importar/", views.painel_convidados_importar, name="painel_convidados_importar"),
+    path("painel/desempenho/", views.painel_desempenho, name="painel_desempenho"),
     path("painel/mensagens/", views.painel_mensagens, name="painel_mensagens"),
+    path("painel/mensagens/caixa/", views.painel_mensagens_caixa, name="painel_mensagens_caixa"),
     path("painel/mensagens/<int:reservation_id>/visto/", views.marcar_mensagem_vista, name="marcar_mensagem_vista"),
     path("painel/mensagens/vistas/", views.marcar_todas_mensagens_vistas, name="marcar_todas_mensagens_vistas"),
 
     # Observador
     path("observador/mensagens/", views.observador_mensagens, name="observador_mensagens"),
+    path("observador/reservas/exportar/", views.observador_exportar, name="observador_exportar"),
     path(
         "observador/mensagens/<int:reservation_id>/ocultar/",
         views.observador_ocultar_mensagem,
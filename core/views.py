@@ -1,25 +1,51 @@
+import hashlib
+import re
 from datetime import date
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError, transaction
-from django.db.models import Exists, OuterRef
-from django.http import Http404, HttpResponseForbidden
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connection, transaction
+from django.db.models import CharField, Exists, OuterRef, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
+from . import events, fragments, perf, search
+from .aggregates import GroupConcat
 from .decorators import event_admin_required, observer_required
+from .exports import reservation_queryset, stream_csv, write_xlsx
 from .forms import (
     LoginForm,
     RegistrationForm,
     DefinePasswordForm,
     GiftForm,
+    GiftImportForm,
+    GuestImportForm,
     SiteSettingsForm,
     SetupForm,
 )
+from .gifts import GiftFileError, archive_path, export_gifts, import_gifts
+from .guests import GuestFileError, import_guests, read_guest_rows
 from .models import Gift, Reservation, SiteSettings, Profile
-from .services import normalize_phone
+from .services import identifier_key, normalize_phone, reserve_gift, unique_username
+from .stats import (
+    delete_messages,
+    get_global_counts,
+    get_registry_stats,
+    get_unseen_message_count,
+    get_user_reserved_count,
+    mark_messages_seen,
+    set_messages_hidden,
+)
 
 User = get_user_model()
 
@@ -32,14 +58,11 @@ def _unique_username_from_email(email: str) -> str:
     base = (email or "").strip().lower()
     if not base:
         base = "usuario"
-    if not User.objects.filter(username__iexact=base).exists():
-        return base
-    counter = 2
-    while True:
-        candidate = f"{base}-{counter}"
-        if not User.objects.filter(username__iexact=candidate).exists():
-            return candidate
-        counter += 1
+    # Uma consulta para todos os candidatos (base, base-2, base-3...)
+    taken = {
+        identifier_key(name) for name in User.objects.filter(username__istartswith=base).values_list("username", flat=True)
+    }
+    return unique_username(base, taken)
 
 
 def setup(request, token: str):
@@ -110,8 +133,8 @@ def login_view(request):
     if request.method == "POST" and form.is_valid():
         user = form.get_user()
         login(request, user)
-        request.session["show_welcome_modal"] = True
-        messages.success(request, "Login realizado com sucesso.")
+        # Marca do modal de boas-vindas vai no aviso (cookie), sem gravar na sessao
+        messages.success(request, "Login realizado com sucesso.", extra_tags="welcome")
         return redirect("catalogo")
 
     return render(request, "auth/login.html", {"form": form})
@@ -130,35 +153,40 @@ def cadastro(request):
 
         existing_user = getattr(form, "existing_user", None)
         if existing_user:
+            # Conta ja existente (ex.: importada pelo painel): basicamente define a senha
             user = existing_user
+            update_fields = ["password"]
+            for field, value in (("email", email), ("first_name", full_name)):
+                if getattr(user, field) != value:
+                    setattr(user, field, value)
+                    update_fields.append(field)
             if not user.username:
                 user.username = _unique_username_from_email(email)
+                update_fields.append("username")
+            user.set_password(password)
+            user.save(update_fields=update_fields)
         else:
             username = _unique_username_from_email(email)
-            user = User(username=username, email=email)
-
-        user.email = email
-        user.first_name = full_name
-        user.set_password(password)
-        try:
-            user.save()
-        except IntegrityError:
-            if existing_user:
-                raise
-            # Garante unicidade mesmo em casos de colisao de username
-            fallback = f"{email}-{User.objects.count() + 1}"
-            user.username = _unique_username_from_email(fallback)
-            user.save()
+            user = User(username=username, email=email, first_name=full_name)
+            user.set_password(password)
+            try:
+                user.save()
+            except IntegrityError:
+                # Garante unicidade mesmo em casos de colisao de username
+                fallback = f"{email}-{User.objects.count() + 1}"
+                user.username = _unique_username_from_email(fallback)
+                user.save()
 
         profile = getattr(user, "profile", None)
         if not profile:
             profile = Profile.objects.create(user=user)
-        profile.phone_number = phone
-        profile.save(update_fields=["phone_number"])
+        if profile.phone_number != phone:
+            profile.phone_number = phone
+            profile.save(update_fields=["phone_number"])
 
         login(request, user)
-        request.session["show_welcome_modal"] = True
-        messages.success(request, "Cadastro realizado com sucesso.")
+        # Marca do modal de boas-vindas vai no aviso (cookie), sem gravar na sessao
+        messages.success(request, "Cadastro realizado com sucesso.", extra_tags="welcome")
         return redirect("catalogo")
 
     return render(request, "auth/cadastro.html", {"form": form})
@@ -181,55 +209,246 @@ def definir_senha(request):
     return render(request, "auth/definir_senha.html", {"form": form})
 
 
-@login_required
-def catalogo(request):
-    qs = Gift.objects.filter(is_active=True).order_by("title").select_related(
+CATALOG_PAGE_SIZE = 24
+CATALOG_CURSOR_SALT = "core.catalogo"
+
+
+CATALOG_FILTERS = {
+    "disponiveis": Q(reservation__isnull=True),
+    "reservados": Q(reservation__isnull=False),
+}
+
+
+def _catalog_filters(request) -> dict:
+    query = (request.GET.get("q") or "").strip()[:100]
+    filtro = request.GET.get("filtro") or ""
+    if filtro not in CATALOG_FILTERS and filtro != "meus":
+        filtro = ""
+    return {"q": query, "filtro": filtro}
+
+
+def _catalog_page(request, filters: dict, cursor: str = ""):
+    """Uma pagina do catalogo por chave (title, id) + cursor da proxima pagina.
+
+    O custo de cada pagina nao depende do tamanho do catalogo: o indice
+    (title, id) leva direto ao ponto de continuacao, sem OFFSET.
+    """
+    qs = Gift.objects.filter(is_active=True).order_by("title", "id").select_related(
         "reservation__user",
         "reservation__user__profile",
     )
 
+    qs = search.filter_gifts(qs, filters["q"])
+    if filters["filtro"] == "meus":
+        qs = qs.filter(reservation__user=request.user)
+    elif filters["filtro"]:
+        qs = qs.filter(CATALOG_FILTERS[filters["filtro"]])
+
+    if cursor:
+        try:
+            after_title, after_id = signing.loads(cursor, salt=CATALOG_CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise Http404()
+        qs = qs.filter(Q(title__gt=after_title) | Q(title=after_title, id__gt=after_id))
+
     reserved_exists = Reservation.objects.filter(gift=OuterRef("pk"))
     reserved_by_me = Reservation.objects.filter(gift=OuterRef("pk"), user=request.user)
 
-    gifts = qs.annotate(
-        reserved=Exists(reserved_exists),
-        reserved_by_me=Exists(reserved_by_me),
+    gifts = list(
+        qs.annotate(
+            reserved=Exists(reserved_exists),
+            reserved_by_me=Exists(reserved_by_me),
+        )[: CATALOG_PAGE_SIZE + 1]
     )
 
-    return render(request, "catalogo/catalogo.html", {"gifts": gifts})
+    next_cursor = ""
+    if len(gifts) > CATALOG_PAGE_SIZE:
+        gifts = gifts[:CATALOG_PAGE_SIZE]
+        last = gifts[-1]
+        next_cursor = signing.dumps([last.title, last.id], salt=CATALOG_CURSOR_SALT)
+    fragments.attach_fragments("card", gifts, fragments.viewer_role(request.user))
+    return gifts, next_cursor
+
+
+def _page_etag(request, *args, **kwargs):
+    """ETag das paginas do catalogo: muda com tudo o que aparece nelas.
+
+    Um reload sem alteracoes recebe 304 sem executar a consulta nem renderizar
+    o template. Entram a versao do RegistryStats (presentes, reservas e
+    mensagens), as configuracoes do site, a data (contagem de dias), o deploy e
+    o que e do usuario: perfil, reservas e o token CSRF dos formularios.
+    Avisos (messages) pendentes, incluindo o de boas-vindas, forcam a resposta completa.
+    """
+    if messages.get_messages(request):
+        return None
+    user = request.user
+    profile = getattr(user, "profile", None)
+    # Reaproveitada pelo context processor se a pagina for renderizada
+    request.registry_stats = get_registry_stats()
+    parts = [
+        settings.RELEASE_ID,
+        request.registry_stats.version,
+        SiteSettings.get_solo().updated_at.isoformat(),
+        date.today().isoformat(),
+        user.pk,
+        user.username,
+        user.get_full_name(),
+        user.is_staff or user.is_superuser,
+        bool(profile and profile.is_event_admin),
+        bool(profile and profile.is_observer),
+        get_user_reserved_count(user),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    ]
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+# O navegador guarda a pagina, mas sempre revalida (If-None-Match -> 304)
+page_revalidate = cache_control(private=True, no_cache=True)
+
+
+@login_required
+@page_revalidate
+@condition(etag_func=_page_etag)
+def catalogo(request):
+    filters = _catalog_filters(request)
+    gifts, next_cursor = _catalog_page(request, filters)
+    return render(
+        request,
+        "catalogo/catalogo.html",
+        {"gifts": gifts, "next_cursor": next_cursor, "filters": filters},
+    )
+
+
+@login_required
+def catalogo_pagina(request):
+    """Fragmento HTML com a proxima pagina de cards (rolagem infinita)."""
+    filters = _catalog_filters(request)
+    gifts, next_cursor = _catalog_page(request, filters, request.GET.get("cursor", ""))
+    return render(
+        request,
+        "catalogo/_pagina.html",
+        {"gifts": gifts, "next_cursor": next_cursor, "filters": filters},
+    )
 
 
 @login_required
+def presente_detalhe(request, gift_id: int):
+    """Conteudo do modal de detalhes de um presente, carregado sob demanda."""
+    gift = get_object_or_404(
+        Gift.objects.select_related("reservation__user", "reservation__user__profile"),
+        id=gift_id,
+        is_active=True,
+    )
+    gift.reserved = gift.is_reserved
+    gift.reserved_by_me = gift.reserved and gift.reservation.user_id == request.user.id
+    # Galeria e links nao dependem de quem ve: um fragmento so para todos
+    fragments.attach_fragments("detail", [gift], "guest")
+    return render(request, "catalogo/_detalhe.html", {"gift": gift})
+
+
+@login_required
+def presente_card(request, gift_id: int):
+    """Card de um presente montado para quem ve.
+
+    Os eventos em tempo real trazem o card anonimo; o observador busca o seu
+    aqui, com o "Reservado por" que o card anonimo nao tem.
+    """
+    gift = get_object_or_404(
+        Gift.objects.select_related("reservation__user", "reservation__user__profile"),
+        id=gift_id,
+        is_active=True,
+    )
+    gift.reserved = gift.is_reserved
+    gift.reserved_by_me = gift.reserved and gift.reservation.user_id == request.user.id
+    fragments.attach_fragments("card", [gift], fragments.viewer_role(request.user))
+    return render(request, "catalogo/_gifts.html", {"gifts": [gift]})
+
+
+async def catalogo_eventos(request):
+    """Server-Sent Events com reservas/liberacoes de presentes (core.events).
+
+    So faz streaming servido pelo ASGI; no WSGI cada cliente ocuparia um worker,
+    entao responde 204 (o EventSource nao reconecta).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return HttpResponseForbidden("Faca login para acompanhar as reservas.")
+    response = StreamingHttpResponse(events.stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+@page_revalidate
+@condition(etag_func=_page_etag)
 def meus_presentes(request):
     reservations = Reservation.objects.filter(user=request.user).select_related("gift").order_by("-created_at")
     return render(request, "catalogo/meus_presentes.html", {"reservations": reservations})
 
 
+def _wants_json(request) -> bool:
+    return "application/json" in request.headers.get("Accept", "")
+
+
 @login_required
-@transaction.atomic
 def reservar_presente(request, gift_id: int):
+    """Reserva um presente.
+
+    Com ``Accept: application/json`` responde 201 (reservado) ou 409 (ja
+    reservado; ``ok`` verdadeiro se a reserva e de quem pediu) com o card
+    atualizado em ``card_html``, sem recarregar o catalogo.
+    """
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
 
-    gift = get_object_or_404(Gift.objects.select_for_update(), id=gift_id, is_active=True)
+    gift = get_object_or_404(Gift, id=gift_id, is_active=True)
 
-    if Reservation.objects.filter(gift=gift).exists():
+    # Reforca anonimato: remove assinaturas obvias? (nao garante)
+    # Nao removemos conteudo, apenas orientamos no UI. reserve_gift limita o tamanho.
+    msg = (request.POST.get("anonymous_message") or "").strip()
+    reservation = reserve_gift(gift, request.user, msg)
+    # Conflito com a propria reserva (ex.: envio duplicado) nao e "outra pessoa"
+    already_mine = reservation is None and Reservation.objects.filter(gift=gift, user=request.user).exists()
+
+    if _wants_json(request):
+        gift.reserved = True
+        gift.reserved_by_me = reservation is not None or already_mine
+        fragments.attach_fragments("card", [gift], fragments.viewer_role(request.user))
+        card_html = render_to_string("catalogo/_gifts.html", {"gifts": [gift]}, request=request)
+        if already_mine:
+            payload = {
+                "ok": True,
+                "gift_id": gift.id,
+                "message": "Voce ja reservou este presente.",
+                "card_html": card_html,
+            }
+            return JsonResponse(payload, status=409)
+        if reservation is None:
+            payload = {
+                "ok": False,
+                "gift_id": gift.id,
+                "error": "Este presente ja esta reservado por outra pessoa.",
+                "card_html": card_html,
+            }
+            return JsonResponse(payload, status=409)
+        payload = {
+            "ok": True,
+            "gift_id": gift.id,
+            "message": "Presente reservado com sucesso.",
+            "card_html": card_html,
+        }
+        return JsonResponse(payload, status=201)
+
+    if already_mine:
+        messages.info(request, "Voce ja reservou este presente.")
+        return redirect("catalogo")
+    if reservation is None:
         messages.error(request, "Este presente ja esta reservado por outra pessoa.")
         return redirect("catalogo")
 
-    msg = (request.POST.get("anonymous_message") or "").strip()
-
-    # Reforca anonimato: remove assinaturas obvias? (nao garante)
-    # Nao removemos conteudo, apenas orientamos no UI. Aqui apenas limitamos tamanho.
-    if len(msg) > 1000:
-        msg = msg[:1000]
-
-    Reservation.objects.create(
-        gift=gift,
-        user=request.user,
-        anonymous_message=msg,
-    )
-
     messages.success(request, "Presente reservado com sucesso.")
     return redirect("catalogo")
 
@@ -257,8 +476,9 @@ def cancelar_reserva(request, gift_id: int):
 
 @event_admin_required
 def painel_dashboard(request):
-    total = Gift.objects.filter(is_active=True).count()
-    reserved = Reservation.objects.count()
+    counts = get_global_counts()
+    total = counts["total_gifts"]
+    reserved = counts["reserved_gifts"]
     available = total - reserved
     percent = round((reserved / total) * 100, 1) if total else 0.0
     # CSS precisa de ponto como separador decimal
@@ -296,8 +516,9 @@ def painel_presentes(request):
     gifts = Gift.objects.all().order_by("-created_at").annotate(
         reserved=Exists(Reservation.objects.filter(gift=OuterRef("pk")))
     )
-    total = gifts.count()
-    reserved = Reservation.objects.count()
+    stats = get_registry_stats()
+    total = stats.total_active
+    reserved = stats.reserved
     available = total - reserved
     return render(
         request,
@@ -346,6 +567,43 @@ def painel_presente_excluir(request, gift_id: int):
     return render(request, "painel/presente_confirm_delete.html", {"gift": gift})
 
 
+@event_admin_required
+def painel_presentes_importar(request):
+    form = GiftImportForm(request.POST or None, request.FILES or None)
+    result = None
+    if request.method == "POST" and form.is_valid():
+        manifesto = form.cleaned_data.get("manifesto")
+        dry_run = form.cleaned_data["dry_run"]
+        try:
+            with archive_path(form.cleaned_data["arquivo"]) as path:
+                result = import_gifts(
+                    path,
+                    manifest_file=manifesto,
+                    manifest_name=manifesto.name if manifesto else "",
+                    dry_run=dry_run,
+                    # Sem pool de processos dentro do worker web (ver importar_presentes)
+                    processes=1,
+                )
+        except GiftFileError as exc:
+            form.add_error("manifesto" if manifesto else "arquivo", str(exc))
+        else:
+            if result.errors:
+                messages.error(request, "Nenhum presente foi criado: corrija os erros abaixo.")
+            elif dry_run:
+                messages.info(request, f"Validacao ok: {result.created} presente(s) seriam criados.")
+            else:
+                messages.success(request, f"{result.created} presente(s) importado(s).")
+    return render(request, "painel/presentes_importar.html", {"form": form, "result": result})
+
+
+@event_admin_required
+def painel_presentes_exportar(request):
+    response = StreamingHttpResponse(export_gifts(), content_type="application/zip")
+    filename = f"presentes-{date.today():%Y%m%d}.zip"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @event_admin_required
 def painel_personalizacao(request):
     site = SiteSettings.get_solo()
@@ -358,14 +616,52 @@ def painel_personalizacao(request):
 
 
 @event_admin_required
-def painel_mensagens(request):
+def painel_convidados_importar(request):
+    form = GuestImportForm(request.POST or None, request.FILES or None)
+    result = None
+    if request.method == "POST" and form.is_valid():
+        arquivo = form.cleaned_data["arquivo"]
+        dry_run = form.cleaned_data["dry_run"]
+        try:
+            rows = read_guest_rows(arquivo, arquivo.name)
+        except GuestFileError as exc:
+            form.add_error("arquivo", str(exc))
+        else:
+            result = import_guests(rows, dry_run=dry_run)
+            if dry_run:
+                messages.info(request, f"Simulacao: {result.created} convidado(s) seriam criados.")
+            elif result.created or not result.errors:
+                messages.success(request, f"{result.created} convidado(s) importado(s).")
+            else:
+                messages.error(request, "Nenhum convidado importado; veja os erros abaixo.")
+    return render(request, "painel/convidados_importar.html", {"form": form, "result": result})
+
+
+@event_admin_required
+def painel_desempenho(request):
+    """Resumo das medicoes por view (PERF_INSTRUMENTATION)."""
+    enabled = settings.PERF_INSTRUMENTATION
+    summary = perf.summary() if enabled else None
+    return render(
+        request,
+        "painel/desempenho.html",
+        {"enabled": enabled, "summary": summary, "fragment_summary": fragments.summary()},
+    )
+
+
+def _admin_messages():
     # Mensagens anonimas (nao exibimos usuario)
-    base_qs = (
+    return (
         Reservation.objects.exclude(anonymous_message="")
         .filter(message_hidden_for_admin=False)
         .select_related("gift")
-        .order_by("-created_at")
+        .order_by("-created_at", "-id")
     )
+
+
+@event_admin_required
+def painel_mensagens(request):
+    base_qs = _admin_messages()
     unseen = base_qs.filter(message_seen=False)
     seen = base_qs.filter(message_seen=True)
     return render(
@@ -380,64 +676,239 @@ def painel_mensagens(request):
     )
 
 
+INBOX_PAGE_SIZE = 10
+INBOX_CURSOR_SALT = "core.caixa"
+
+
+@event_admin_required
+def painel_mensagens_caixa(request):
+    """Fragmento da caixa de mensagens do sino (carregado ao abrir, paginado por chave)."""
+    seen = request.GET.get("aba") == "vistos"
+    qs = _admin_messages().filter(message_seen=seen)
+    cursor = request.GET.get("cursor", "")
+    if cursor:
+        try:
+            created_at, after_id = signing.loads(cursor, salt=INBOX_CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise Http404()
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise Http404()
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=after_id))
+
+    reservations = list(qs[: INBOX_PAGE_SIZE + 1])
+    next_cursor = ""
+    if len(reservations) > INBOX_PAGE_SIZE:
+        reservations = reservations[:INBOX_PAGE_SIZE]
+        last = reservations[-1]
+        next_cursor = signing.dumps([last.created_at.isoformat(), last.id], salt=INBOX_CURSOR_SALT)
+    return render(
+        request,
+        "painel/_caixa_mensagens.html",
+        {
+            "reservations": reservations,
+            "seen": seen,
+            "next_cursor": next_cursor,
+            "first_page": not cursor,
+        },
+    )
+
+
+def _messages_changed(request, fallback: str):
+    """Resposta das acoes sobre mensagens: JSON com a contagem nova ou redirect."""
+    if _wants_json(request):
+        return JsonResponse({"ok": True, "unseen_count": get_unseen_message_count()})
+    return redirect(request.META.get("HTTP_REFERER", fallback))
+
+
 @event_admin_required
 def marcar_mensagem_vista(request, reservation_id: int):
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
-    Reservation.objects.filter(id=reservation_id, message_hidden_for_admin=False).update(message_seen=True)
-    return redirect(request.META.get("HTTP_REFERER", "painel_mensagens"))
+    mark_messages_seen(Reservation.objects.filter(id=reservation_id))
+    return _messages_changed(request, "painel_mensagens")
 
 
 @event_admin_required
 def marcar_todas_mensagens_vistas(request):
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
-    Reservation.objects.exclude(anonymous_message="").filter(
-        message_seen=False,
-        message_hidden_for_admin=False,
-    ).update(message_seen=True)
-    return redirect(request.META.get("HTTP_REFERER", "painel_mensagens"))
+    mark_messages_seen(Reservation.objects.all())
+    return _messages_changed(request, "painel_mensagens")
 
 
-@observer_required
-def observador_mensagens(request):
-    reservations = (
-        Reservation.objects.exclude(anonymous_message="")
-        .select_related("gift", "user", "user__profile")
-        .order_by("-created_at")
+OBSERVER_USERS_PAGE_SIZE = 25
+OBSERVER_MESSAGES_PAGE_SIZE = 20
+OBSERVER_CURSOR_SALT = "core.observador"
+# Separadores da lista "id<US>titulo<RS>id<US>titulo" agregada no banco
+FIELD_SEP = "\x1f"
+ITEM_SEP = "\x1e"
+
+
+def _load_cursor(value: str, kind: str):
+    if not value:
+        return None
+    try:
+        data = signing.loads(value, salt=OBSERVER_CURSOR_SALT)
+    except signing.BadSignature:
+        raise Http404()
+    if not isinstance(data, list) or len(data) != 3 or data[0] != kind:
+        raise Http404()
+    return data[1], data[2]
+
+
+def _prefix_q(field: str, term: str) -> Q:
+    # Colunas ja normalizadas (casefold): um intervalo usa o indice em qualquer banco.
+    # No Postgres, startswith usa o indice *_like (varchar_pattern_ops) criado pelo Django.
+    if connection.vendor == "postgresql":
+        return Q(**{f"{field}__startswith": term})
+    return Q(**{f"{field}__gte": term, f"{field}__lt": term + "\U0010ffff"})
+
+
+def _observer_search(query: str, prefix: str = "") -> Q:
+    """Busca por nome, email ou telefone; ``prefix`` e o caminho ate Profile."""
+    term = identifier_key(query)
+    if not term:
+        return Q()
+    lookup = (
+        _prefix_q(f"{prefix}name_key", term)
+        | _prefix_q(f"{prefix}email_key", term)
+        | _prefix_q(f"{prefix}username_key", term)
+    )
+    if len(re.sub(r"\D+", "", query)) >= 8:
+        lookup |= Q(**{f"{prefix}phone_number": normalize_phone(query)})
+    return lookup
+
+
+def _observer_users_page(query: str, cursor: str):
+    """Uma pagina de usuarios por chave (name_key, user_id), com as reservas agregadas no banco."""
+    qs = Profile.objects.filter(_observer_search(query)).order_by("name_key", "user_id")
+    after = _load_cursor(cursor, "u")
+    if after:
+        qs = qs.filter(Q(name_key__gt=after[0]) | Q(name_key=after[0], user_id__gt=after[1]))
+
+    rows = list(
+        qs.values(
+            "user_id",
+            "name_key",
+            "phone_number",
+            "user__first_name",
+            "user__last_name",
+            "user__username",
+            "user__email",
+        ).annotate(
+            reserved_items=GroupConcat(
+                Concat(
+                    Cast("user__reservations__id", CharField()),
+                    Value(FIELD_SEP),
+                    "user__reservations__gift__title",
+                    output_field=CharField(),
+                ),
+                separator=ITEM_SEP,
+                filter=Q(user__reservations__isnull=False),
+            )
+        )[: OBSERVER_USERS_PAGE_SIZE + 1]
     )
-    users = User.objects.select_related("profile").order_by("first_name", "username")
-    reservations_by_user = {}
-    for reservation in Reservation.objects.select_related("gift", "user").order_by("gift__title"):
-        reservations_by_user.setdefault(reservation.user_id, []).append(reservation)
 
-    observer_users = []
-    for user in users:
-        profile = getattr(user, "profile", None)
-        display_name = profile.display_name if profile else (user.get_full_name() or user.username)
-        user_reservations = reservations_by_user.get(user.id, [])
-        observer_users.append(
+    next_cursor = ""
+    if len(rows) > OBSERVER_USERS_PAGE_SIZE:
+        rows = rows[:OBSERVER_USERS_PAGE_SIZE]
+        next_cursor = signing.dumps(["u", rows[-1]["name_key"], rows[-1]["user_id"]], salt=OBSERVER_CURSOR_SALT)
+
+    users = []
+    for row in rows:
+        full_name = f"{row['user__first_name']} {row['user__last_name']}".strip()
+        reservations = []
+        for item in (row["reserved_items"] or "").split(ITEM_SEP):
+            if item:
+                reservation_id, _, title = item.partition(FIELD_SEP)
+                reservations.append({"id": reservation_id, "title": title})
+        reservations.sort(key=lambda res: res["title"])
+        users.append(
             {
-                "id": user.id,
-                "name": display_name,
-                "email": user.email,
-                "reservations": user_reservations,
-                "gifts": [res.gift.title for res in user_reservations],
+                "id": row["user_id"],
+                "name": full_name or row["user__username"] or "Convidado",
+                "email": row["user__email"],
+                "phone": row["phone_number"],
+                "reservations": reservations,
+                "gifts": [res["title"] for res in reservations],
             }
         )
+    return users, next_cursor
+
 
+def _observer_messages_page(cursor: str):
+    qs = (
+        Reservation.objects.exclude(anonymous_message="")
+        .select_related("gift", "user")
+        .order_by("-created_at", "-id")
+    )
+    after = _load_cursor(cursor, "m")
+    if after:
+        created_at = parse_datetime(after[0])
+        if created_at is None:
+            raise Http404()
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=after[1]))
+    reservations = list(qs[: OBSERVER_MESSAGES_PAGE_SIZE + 1])
+    next_cursor = ""
+    if len(reservations) > OBSERVER_MESSAGES_PAGE_SIZE:
+        reservations = reservations[:OBSERVER_MESSAGES_PAGE_SIZE]
+        last = reservations[-1]
+        next_cursor = signing.dumps(["m", last.created_at.isoformat(), last.id], salt=OBSERVER_CURSOR_SALT)
+    return reservations, next_cursor
+
+
+@observer_required
+def observador_mensagens(request):
+    """Mensagens e usuarios do observador, ambos paginados por chave.
+
+    O custo de cada pagina depende so do tamanho da pagina: a lista de presentes
+    de cada usuario vem agregada do banco (GroupConcat) e a busca usa as colunas
+    normalizadas e indexadas de Profile.
+    """
+    query = (request.GET.get("q") or "").strip()[:100]
+    reservations, messages_cursor = _observer_messages_page(request.GET.get("mcursor", ""))
+    observer_users, users_cursor = _observer_users_page(query, request.GET.get("cursor", ""))
     return render(
         request,
         "observador/mensagens.html",
-        {"reservations": reservations, "observer_users": observer_users},
+        {
+            "reservations": reservations,
+            "observer_users": observer_users,
+            "q": query,
+            "messages_cursor": messages_cursor,
+            "users_cursor": users_cursor,
+            "paginated": bool(request.GET.get("mcursor") or request.GET.get("cursor")),
+        },
+    )
+
+
+@observer_required
+def observador_exportar(request):
+    """Reservas (presente, quem reservou, mensagem) em CSV ou XLSX, com os filtros da pagina."""
+    query = (request.GET.get("q") or "").strip()[:100]
+    queryset = reservation_queryset(
+        _observer_search(query, prefix="user__profile__"),
+        with_message=request.GET.get("mensagens") == "1",
     )
+    filename = f"reservas-{date.today():%Y%m%d}"
+    if request.GET.get("formato") == "xlsx":
+        return FileResponse(
+            write_xlsx(queryset),
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    response = StreamingHttpResponse(stream_csv(queryset), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
 
 
 @observer_required
 def observador_ocultar_mensagem(request, reservation_id: int):
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
-    Reservation.objects.filter(id=reservation_id).update(message_hidden_for_admin=True)
+    set_messages_hidden(Reservation.objects.filter(id=reservation_id), hidden=True)
     return redirect(request.META.get("HTTP_REFERER", "observador_mensagens"))
 
 
@@ -445,7 +916,7 @@ def observador_ocultar_mensagem(request, reservation_id: int):
 def observador_mostrar_mensagem(request, reservation_id: int):
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
-    Reservation.objects.filter(id=reservation_id).update(message_hidden_for_admin=False)
+    set_messages_hidden(Reservation.objects.filter(id=reservation_id), hidden=False)
     return redirect(request.META.get("HTTP_REFERER", "observador_mensagens"))
 
 
@@ -453,11 +924,7 @@ def observador_mostrar_mensagem(request, reservation_id: int):
 def observador_excluir_mensagem(request, reservation_id: int):
     if request.method != "POST":
         return HttpResponseForbidden("Metodo nao permitido.")
-    Reservation.objects.filter(id=reservation_id).update(
-        anonymous_message="",
-        message_hidden_for_admin=True,
-        message_seen=True,
-    )
+    delete_messages(Reservation.objects.filter(id=reservation_id))
     return redirect(request.META.get("HTTP_REFERER", "observador_mensagens"))
 
 
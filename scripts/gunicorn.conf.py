@@ -0,0 +1,88 @@
+"""Configuracao do gunicorn (usada por scripts/start.sh).
+
+- preload_app: o Django (apps, URLs, templates, whitenoise) carrega uma vez no
+  master; os workers saem do fork ja prontos e compartilham essa memoria.
+- gc.freeze() antes do fork: os objetos ja carregados saem da coleta de lixo,
+  entao o GC dos workers nao toca (e nao copia) as paginas compartilhadas.
+- workers/threads pelo numero de CPUs do container; WEB_CONCURRENCY e
+  GUNICORN_THREADS sobrepoem.
+- Ao ficar pronto, o master registra quanto levou cada fase desde o inicio
+  do start.sh (BOOT_STARTED_NS) e avisa se ha varios workers sem REDIS_URL.
+"""
+import gc
+import math
+import os
+import time
+from pathlib import Path
+
+CONFIG_LOADED_NS = time.time_ns()
+
+# Sem coleta durante o carregamento: menos fragmentacao antes do freeze
+gc.disable()
+
+
+def cpu_count() -> int:
+    # Limite do cgroup v2 ("200000 100000" = 2 CPUs); os.cpu_count() veria a maquina toda
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+cpus = cpu_count()
+asgi = os.getenv("ASGI", "0") == "1"
+# Sem Redis, eventos em tempo real (LocalBroker) e sessoes em locmem ficam dentro do processo
+single_process = (asgi and not os.getenv("REDIS_URL")) or os.getenv("SESSION_CACHE") == "locmem"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+preload_app = True
+if asgi:
+    worker_class = "uvicorn.workers.UvicornWorker"
+    default_workers = 1 if single_process else cpus + 1
+else:
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+    default_workers = 1 if single_process else min(cpus * 2 + 1, 8)
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers
+
+
+def _seconds(start_ns: int, end_ns: int) -> str:
+    return f"{(end_ns - start_ns) / 1e9:.2f}s"
+
+
+def when_ready(server):
+    from django.db import connections
+
+    # Nenhuma conexao do master deve ser herdada pelos workers
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+
+    ready_ns = time.time_ns()
+    phases = [f"app {_seconds(CONFIG_LOADED_NS, ready_ns)}"]
+    boot_started = int(os.getenv("BOOT_STARTED_NS", "0"))
+    prepared = int(os.getenv("BOOT_PREPARED_NS", "0"))
+    if boot_started and prepared:
+        phases.insert(0, f"preparar_boot {_seconds(boot_started, prepared)}")
+    if boot_started:
+        phases.append(f"total {_seconds(boot_started, ready_ns)}")
+    if server.cfg.workers > 1 and not os.getenv("REDIS_URL"):
+        server.log.warning(
+            "Boot: %s workers sem REDIS_URL; o cache em disco fica lento e nao e atomico entre processos. "
+            "Configure REDIS_URL (ou WEB_CONCURRENCY=1).",
+            server.cfg.workers,
+        )
+    server.log.info(
+        "Boot: %s | %s worker(s) %s%s, %s CPU(s)",
+        ", ".join(phases),
+        server.cfg.workers,
+        server.cfg.worker_class_str,
+        f" x {server.cfg.threads} threads" if not asgi else "",
+        cpus,
+    )
@@ -1,9 +1,20 @@
 #!/usr/bin/env bash
 set -o errexit
 
-# Migrações e estáticos
-python manage.py migrate --noinput
-python manage.py collectstatic --noinput
+# Inicio do boot; o gunicorn mostra o tempo de cada fase ao ficar pronto
+export BOOT_STARTED_NS="$(date +%s%N)"
 
-# Inicia o servidor
-gunicorn chadepanela.wsgi:application --bind 0.0.0.0:${PORT:-8000}
+# Migrações e estáticos só quando necessário (core.boot); BOOT_FULL=1 força os dois
+if [ "${BOOT_FULL:-0}" = "1" ]; then
+  python manage.py preparar_boot --force
+else
+  python manage.py preparar_boot
+fi
+export BOOT_PREPARED_NS="$(date +%s%N)"
+
+# Inicia o servidor: preload, gc.freeze e workers/threads em scripts/gunicorn.conf.py
+# ASGI=1: worker do uvicorn (necessario para as reservas em tempo real via SSE)
+if [ "${ASGI:-0}" = "1" ]; then
+  exec gunicorn chadepanela.asgi:application -c scripts/gunicorn.conf.py
+fi
+exec gunicorn chadepanela.wsgi:application -c scripts/gunicorn.conf.py
@@ -2,6 +2,47 @@
 // Você pode expandir aqui caso queira filtros/pesquisa no catálogo etc.
 
 (function () {
+  // Detalhes do presente: o modal e unico e o conteudo vem de presente_detalhe.
+  var modalEl = document.getElementById("giftModal");
+  var contentEl = modalEl && modalEl.querySelector("[data-gift-modal-content]");
+  var cache = {};
+
+  function fetchDetail(url) {
+    if (!cache[url]) {
+      cache[url] = fetch(url, {
+        credentials: "same-origin",
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      }).then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      });
+      cache[url].catch(function () {
+        delete cache[url];
+      });
+    }
+    return cache[url];
+  }
+
+  function prefetch(event) {
+    var card = event.target.closest && event.target.closest(".cp-card-clickable");
+    if (card && card.getAttribute("data-detail-url")) {
+      fetchDetail(card.getAttribute("data-detail-url")).catch(function () {});
+    }
+  }
+
+  // Card atualizado por reserva em tempo real: o detalhe em cache ficou velho
+  document.addEventListener("cp:gift-updated", function (event) {
+    delete cache[event.detail.detailUrl];
+  });
+
+  if (modalEl && contentEl) {
+    document.addEventListener("mouseover", prefetch);
+    document.addEventListener("touchstart", prefetch, { passive: true });
+    document.addEventListener("focusin", prefetch);
+  }
+
   document.addEventListener("click", function (event) {
     if (event.target.closest(".cp-stop")) {
       return;
@@ -10,17 +51,391 @@
     if (!card) {
       return;
     }
-    var modalId = card.getAttribute("data-modal-id");
-    if (!modalId) {
-      return;
-    }
-    var modalEl = document.getElementById(modalId);
-    if (!modalEl || !window.bootstrap) {
+    var url = card.getAttribute("data-detail-url");
+    if (!url || !modalEl || !contentEl || !window.bootstrap) {
       return;
     }
+    contentEl.innerHTML =
+      '<div class="modal-body text-center py-5"><span class="spinner-border text-secondary" role="status"></span></div>';
     var modal = bootstrap.Modal.getOrCreateInstance(modalEl);
     modal.show();
+    fetchDetail(url)
+      .then(function (html) {
+        contentEl.innerHTML = html;
+      })
+      .catch(function () {
+        contentEl.innerHTML =
+          '<div class="modal-body text-center text-muted py-5">Nao foi possivel carregar o presente.</div>';
+      });
   });
+
+  // Modal de reserva compartilhado: recebe destino e titulo do botao que o abriu.
+  var reserveEl = document.getElementById("reserveModal");
+  if (reserveEl) {
+    reserveEl.addEventListener("show.bs.modal", function (event) {
+      var trigger = event.relatedTarget;
+      if (!trigger) {
+        return;
+      }
+      var form = reserveEl.querySelector("[data-reserve-form]");
+      var title = reserveEl.querySelector("[data-reserve-title]");
+      var error = reserveEl.querySelector("[data-reserve-error]");
+      form.setAttribute("action", trigger.getAttribute("data-reserve-url") || "");
+      title.textContent = trigger.getAttribute("data-gift-title") || "";
+      error.classList.add("d-none");
+    });
+
+    // Reserva sem recarregar o catalogo: 201 reservado, 409 ja reservado.
+    reserveEl.addEventListener("submit", function (event) {
+      var form = event.target.closest("[data-reserve-form]");
+      if (!form || !window.fetch) {
+        return;
+      }
+      event.preventDefault();
+      var submitBtn = form.querySelector("[type=submit]");
+      var error = reserveEl.querySelector("[data-reserve-error]");
+      submitBtn.disabled = true;
+      fetch(form.getAttribute("action"), {
+        method: "POST",
+        body: new FormData(form),
+        credentials: "same-origin",
+        headers: { Accept: "application/json" },
+      })
+        .then(function (response) {
+          if (response.status !== 201 && response.status !== 409) {
+            throw new Error("HTTP " + response.status);
+          }
+          return response.json();
+        })
+        .then(function (data) {
+          replaceCard(data.gift_id, data.card_html);
+          if (data.ok) {
+            form.reset();
+            bootstrap.Modal.getOrCreateInstance(reserveEl).hide();
+          } else {
+            error.textContent = data.error;
+            error.classList.remove("d-none");
+          }
+        })
+        .catch(function () {
+          // Sem resposta util: envia o formulario normalmente
+          form.submit();
+        })
+        .then(function () {
+          submitBtn.disabled = false;
+        });
+    });
+  }
+
+  function replaceCard(giftId, html) {
+    var card = document.querySelector('[data-gift-card="' + giftId + '"]');
+    if (!card || !html) {
+      return;
+    }
+    var tpl = document.createElement("template");
+    tpl.innerHTML = html.trim();
+    var fresh = tpl.content.firstElementChild;
+    if (fresh) {
+      card.parentNode.replaceChild(fresh, card);
+      var detailUrl = fresh.querySelector("[data-detail-url]");
+      if (detailUrl) {
+        delete cache[detailUrl.getAttribute("data-detail-url")];
+      }
+    }
+  }
+})();
+
+(function () {
+  // Reservas em tempo real (core.events): atualiza cards e contadores sem recarregar.
+  var live = document.querySelector("[data-live-events]");
+  if (!live || !window.EventSource) {
+    return;
+  }
+
+  function setStat(name, value) {
+    var el = document.querySelector('[data-stat="' + name + '"]');
+    if (el) {
+      el.textContent = value;
+    }
+  }
+
+  // Observador: o card anonimo do evento nao tem "Reservado por"; busca o proprio
+  var cardUrl = live.getAttribute("data-live-card-url");
+
+  function swapCard(card, html) {
+    var tpl = document.createElement("template");
+    tpl.innerHTML = html.trim();
+    var fresh = tpl.content.firstElementChild;
+    if (!fresh) {
+      return;
+    }
+    card.parentNode.replaceChild(fresh, card);
+    var detail = fresh.querySelector("[data-detail-url]");
+    if (detail) {
+      document.dispatchEvent(
+        new CustomEvent("cp:gift-updated", { detail: { detailUrl: detail.getAttribute("data-detail-url") } })
+      );
+    }
+  }
+
+  function fetchCard(giftId) {
+    fetch(cardUrl.replace("/0/", "/" + giftId + "/"), {
+      credentials: "same-origin",
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        // O card pode ter sido trocado enquanto a resposta chegava
+        var card = document.querySelector('[data-gift-card="' + giftId + '"]');
+        if (card) {
+          swapCard(card, html);
+        }
+      })
+      .catch(function () {
+        // Fica o card atual; o proximo evento ou reload corrige
+      });
+  }
+
+  function apply(reserved, event) {
+    var data;
+    try {
+      data = JSON.parse(event.data);
+    } catch (err) {
+      return;
+    }
+    var card = document.querySelector('[data-gift-card="' + data.gift_id + '"]');
+    if (card && data.card_html) {
+      if (cardUrl && window.fetch) {
+        fetchCard(data.gift_id);
+      } else if (!(reserved && card.hasAttribute("data-reserved-by-me"))) {
+        // O proprio convidado ja recebeu o card "reservado por voce" na resposta da reserva
+        swapCard(card, data.card_html);
+      }
+    }
+    setStat("total", data.total_gifts);
+    setStat("reserved", data.reserved_gifts);
+    setStat("available", data.total_gifts - data.reserved_gifts);
+  }
+
+  var source = new EventSource(live.getAttribute("data-live-events"));
+  source.addEventListener("gift-reserved", function (event) {
+    apply(true, event);
+  });
+  source.addEventListener("gift-released", function (event) {
+    apply(false, event);
+  });
+})();
+
+(function () {
+  // Caixa de mensagens do admin: carrega ao abrir o sino e marca como visto sem recarregar.
+  var inbox = document.querySelector("[data-inbox]");
+  if (!inbox || !window.fetch) {
+    return;
+  }
+  var loaded = {};
+
+  function load(list, url, append) {
+    return fetch(url, {
+      credentials: "same-origin",
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        if (append) {
+          list.insertAdjacentHTML("beforeend", html);
+        } else {
+          list.innerHTML = html;
+        }
+      });
+  }
+
+  function loadTab(name) {
+    var list = inbox.querySelector('[data-inbox-list="' + name + '"]');
+    if (!list || loaded[name]) {
+      return;
+    }
+    loaded[name] = true;
+    list.innerHTML = '<div class="text-center py-3"><span class="spinner-border spinner-border-sm text-secondary" role="status"></span></div>';
+    load(list, inbox.getAttribute("data-url") + "?aba=" + name).catch(function () {
+      loaded[name] = false;
+      list.innerHTML = '<div class="text-muted small">Nao foi possivel carregar as mensagens.</div>';
+    });
+  }
+
+  function setCount(count) {
+    var counter = inbox.querySelector("[data-inbox-count]");
+    var dot = inbox.querySelector("[data-inbox-dot]");
+    if (counter) {
+      counter.textContent = count;
+    }
+    if (dot) {
+      dot.classList.toggle("d-none", !count);
+    }
+  }
+
+  function post(form) {
+    return fetch(form.getAttribute("action"), {
+      method: "POST",
+      body: new FormData(form),
+      credentials: "same-origin",
+      headers: { Accept: "application/json" },
+    }).then(function (response) {
+      if (!response.ok) {
+        throw new Error("HTTP " + response.status);
+      }
+      return response.json();
+    });
+  }
+
+  inbox.addEventListener("show.bs.dropdown", function () {
+    loadTab("nao-vistos");
+  });
+  inbox.addEventListener("shown.bs.tab", function (event) {
+    if (event.target.getAttribute("data-bs-target") === "#cp-notif-seen") {
+      loadTab("vistos");
+    }
+  });
+
+  inbox.addEventListener("click", function (event) {
+    var more = event.target.closest("[data-inbox-more]");
+    if (!more) {
+      return;
+    }
+    more.disabled = true;
+    load(more.parentNode, more.getAttribute("data-url"), true)
+      .then(function () {
+        more.parentNode.removeChild(more);
+      })
+      .catch(function () {
+        more.disabled = false;
+      });
+  });
+
+  inbox.addEventListener("submit", function (event) {
+    var form = event.target.closest("[data-inbox-mark], [data-inbox-mark-all]");
+    if (!form) {
+      return;
+    }
+    event.preventDefault();
+    post(form)
+      .then(function (data) {
+        setCount(data.unseen_count);
+        if (form.hasAttribute("data-inbox-mark")) {
+          var item = form.closest("[data-inbox-item]");
+          item.parentNode.removeChild(item);
+        } else {
+          inbox.querySelector('[data-inbox-list="nao-vistos"]').innerHTML =
+            '<div class="text-muted small">Nenhuma mensagem nova.</div>';
+        }
+        // A aba "Vistos" mudou: recarrega quando for aberta de novo
+        loaded.vistos = false;
+      })
+      .catch(function () {
+        form.submit();
+      });
+  });
+})();
+
+(function () {
+  // Rolagem infinita do catalogo: cada pagina traz os cards e o proximo "carregar mais".
+  var grid = document.querySelector("[data-catalog-grid]");
+  if (!grid) {
+    return;
+  }
+
+  var loading = false;
+  var observer = null;
+
+  function currentMore() {
+    return document.querySelector("[data-catalog-more]");
+  }
+
+  function loadMore() {
+    var more = currentMore();
+    if (!more || loading) {
+      return;
+    }
+    loading = true;
+    var btn = more.querySelector("[data-catalog-more-btn]");
+    if (btn) {
+      btn.disabled = true;
+    }
+    fetch(more.getAttribute("data-url"), {
+      credentials: "same-origin",
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var tpl = document.createElement("template");
+        tpl.innerHTML = html;
+        var nextMore = tpl.content.querySelector("[data-catalog-more]");
+        if (nextMore) {
+          nextMore.parentNode.removeChild(nextMore);
+        }
+        grid.appendChild(tpl.content);
+        if (observer) {
+          observer.unobserve(more);
+        }
+        if (nextMore) {
+          more.parentNode.replaceChild(nextMore, more);
+          watch(nextMore);
+        } else {
+          more.parentNode.removeChild(more);
+        }
+      })
+      .catch(function () {
+        if (btn) {
+          btn.disabled = false;
+        }
+      })
+      .then(function () {
+        loading = false;
+      });
+  }
+
+  function watch(more) {
+    if (observer) {
+      observer.observe(more);
+    }
+  }
+
+  document.addEventListener("click", function (event) {
+    if (event.target.closest("[data-catalog-more-btn]")) {
+      loadMore();
+    }
+  });
+
+  if ("IntersectionObserver" in window) {
+    observer = new IntersectionObserver(
+      function (entries) {
+        entries.forEach(function (entry) {
+          if (entry.isIntersecting) {
+            loadMore();
+          }
+        });
+      },
+      { rootMargin: "600px 0px" }
+    );
+    var first = currentMore();
+    if (first) {
+      watch(first);
+    }
+  }
 })();
 
 (function () {